@@ -0,0 +1,78 @@
+"""Costo de un sondeo a /api/users: reconstruyendo la respuesta en cada pedido
+(como antes), desde el cuerpo en caché y con If-None-Match respondido con 304;
+y cuánto baja al pedir solo una página sin historial (lo que se sirve por defecto).
+
+Uso: python benchmarks/bench_api_users.py [usuarios] [entradas_por_usuario] [pedidos]
+"""
+import os
+import sys
+import time
+import asyncio
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("DISCORD_BOT_TOKEN", "bench")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import data_manager
+from data_manager import HistoryEntry, UserRecord
+import main as bot_main
+
+
+def poblar(usuarios, entradas):
+    base = datetime.utcnow() - timedelta(days=1)
+    for u in range(usuarios):
+        nombre = f"jugador{u}"
+        data_manager.user_data[nombre] = UserRecord(
+            discord_id=u, score=u % 300,
+            equipo={"arma_principal": "Espada", "arma_secundaria": "Escudo", "rol": "TANK", "gear_score": 4000}
+        )
+        for e in range(entradas):
+            data_manager.score_history.agregar(nombre, HistoryEntry(base + timedelta(minutes=e), 10, f"Evento PVP{e}: ASISTIÓ"))
+
+
+async def medir(cliente, pedidos, url, headers=None, invalidar=False):
+    tamano = 0
+    inicio = time.perf_counter()
+    for _ in range(pedidos):
+        if invalidar:
+            data_manager.marcar_modificado()
+        respuesta = await cliente.get(url, headers=headers)
+        tamano = len(await respuesta.read())
+        estado = respuesta.status
+    return (time.perf_counter() - inicio) / pedidos, tamano, estado
+
+
+async def main_async(pedidos):
+    app = web.Application()
+    app.router.add_get("/api/users", bot_main.handle_users)
+    # Todos los usuarios con su historial: lo que devolvía siempre el endpoint.
+    completo = f"/api/users?fields={','.join(bot_main.CAMPOS_USUARIO)}"
+    async with TestClient(TestServer(app)) as cliente:
+        casos = [
+            ("completa, reconstruida", await medir(cliente, pedidos, completo, invalidar=True)),
+            ("completa, en caché", await medir(cliente, pedidos, completo)),
+        ]
+        etag = (await cliente.get(completo)).headers["ETag"]
+        casos.append(("completa, If-None-Match (304)", await medir(cliente, pedidos, completo, headers={"If-None-Match": etag})))
+        pagina = f"/api/users?limit={bot_main.API_LIMITE_POR_DEFECTO}"
+        casos.append(("página de 100, reconstruida", await medir(cliente, pedidos, pagina, invalidar=True)))
+    return casos
+
+
+def main():
+    usuarios = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    entradas = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    pedidos = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    poblar(usuarios, entradas)
+    print(f"Usuarios: {usuarios}  Entradas de historial por usuario: {entradas}  Pedidos: {pedidos}")
+    for etiqueta, (segundos, tamano, estado) in asyncio.run(main_async(pedidos)):
+        print(f"{etiqueta:>33}:  {segundos * 1000:8.2f} ms por pedido  {estado}  {tamano / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compara los backends de ocr.py (OCR_BACKEND) sobre las mismas capturas:
+latencia por captura (p50/p95), tasa de error y capturas por segundo.
+
+Las capturas salen de benchmarks/capturas/ (PNG o JPG). Si la carpeta está vacía se
+generan capturas sintéticas legibles con los nombres jugador0..39, los mismos que
+devuelve mock_ocr.py; se pueden reemplazar por capturas reales del juego.
+OCR.Space se mide contra el mock, salvo que se pase OCR_URL; Tesseract se salta si
+no está instalado.
+
+Uso: python benchmarks/bench_backends_ocr.py [capturas] [backend ...]
+"""
+import io
+import os
+import sys
+import time
+import random
+import shutil
+import asyncio
+import logging
+import statistics
+
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_ocr import NOMBRES_POR_IMAGEN, crear_app, iniciar_en_hilo
+
+CARPETA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capturas")
+ANCHO, ALTO = 1920, 1080
+
+
+def captura_sintetica(semilla):
+    rng = random.Random(semilla)
+    ruido = Image.frombytes("RGB", (ANCHO // 8, ALTO // 8), rng.randbytes(ANCHO // 8 * ALTO // 8 * 3))
+    imagen = ruido.resize((ANCHO, ALTO), Image.BILINEAR)
+    dibujo = ImageDraw.Draw(imagen)
+    fuente = ImageFont.load_default(size=22)
+    dibujo.rectangle((int(ANCHO * 0.05), int(ALTO * 0.04), int(ANCHO * 0.4), int(ALTO * 0.98)), fill=(20, 20, 30))
+    for fila in range(NOMBRES_POR_IMAGEN):
+        y = int(ALTO * 0.05) + fila * 25
+        dibujo.text((int(ANCHO * 0.06), y), f"jugador{fila}", font=fuente, fill=(230, 230, 230))
+        dibujo.text((int(ANCHO * 0.25), y), f"Lv{rng.randrange(1, 60)}", font=fuente, fill=(180, 180, 120))
+    salida = io.BytesIO()
+    imagen.save(salida, format="PNG")
+    return salida.getvalue()
+
+
+def cargar_capturas(cantidad):
+    os.makedirs(CARPETA, exist_ok=True)
+    archivos = sorted(f for f in os.listdir(CARPETA) if f.lower().endswith((".png", ".jpg", ".jpeg")))
+    if not archivos:
+        for i in range(cantidad):
+            with open(os.path.join(CARPETA, f"sintetica{i}.png"), "wb") as f:
+                f.write(captura_sintetica(i))
+        archivos = sorted(os.listdir(CARPETA))
+    capturas = []
+    for archivo in archivos[:cantidad]:
+        with open(os.path.join(CARPETA, archivo), "rb") as f:
+            capturas.append((archivo, f.read()))
+    return capturas
+
+
+async def medir(ocr, backend, capturas):
+    await ocr.cerrar()
+    ocr.OCR_BACKEND = backend
+    ocr._cache.clear()
+
+    async def una(nombre, datos):
+        inicio = time.perf_counter()
+        try:
+            lineas = await ocr.leer_imagen(nombre, datos)
+        except ocr.ErrorOCR as e:
+            return time.perf_counter() - inicio, e
+        return time.perf_counter() - inicio, lineas
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(una(nombre, datos) for nombre, datos in capturas))
+    total = time.perf_counter() - inicio
+    await ocr.cerrar()
+    return total, resultados
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    backends = sys.argv[2:] or ["ocrspace", "tesseract"]
+
+    detener = None
+    if "OCR_URL" not in os.environ:
+        app = crear_app(latencia=0.3, tasa_fallos=0.1, semilla=1, por_mb=1.0)
+        url, detener = iniciar_en_hilo(app)
+        os.environ["OCR_URL"] = url
+    os.environ.pop("OCR_CACHE_DIR", None)
+    os.environ.setdefault("OCR_ESPERA_BASE", "0.1")
+    logging.getLogger("ocr").setLevel(logging.ERROR)
+    import ocr
+
+    capturas = cargar_capturas(cantidad)
+    print(f"Capturas: {len(capturas)} de {CARPETA}  OCR.Space: {os.environ['OCR_URL']}  Procesos: {ocr.OCR_PROCESOS}")
+    for backend in backends:
+        if backend == "tesseract" and shutil.which(ocr.OCR_TESSERACT_CMD) is None:
+            print(f"{backend:>10}:  se omite, '{ocr.OCR_TESSERACT_CMD}' no está instalado")
+            continue
+        total, resultados = asyncio.run(medir(ocr, backend, capturas))
+        latencias = sorted(latencia for latencia, _ in resultados)
+        errores = [r for _, r in resultados if isinstance(r, ocr.ErrorOCR)]
+        lineas = [len(r) for _, r in resultados if not isinstance(r, ocr.ErrorOCR)]
+        p95 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))]
+        print(f"{backend:>10}:  p50 {statistics.median(latencias) * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  "
+              f"errores {len(errores) / len(resultados):5.0%}  {len(resultados) / total:6.2f} capturas/s  "
+              f"{statistics.mean(lineas) if lineas else 0:5.1f} líneas por captura")
+        for error in errores[:3]:
+            print(f"{'':>12}{error}")
+
+    if detener:
+        detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Mide el índice de trigramas de coincidencias.py: armado, altas y bajas sueltas y
+la búsqueda de líneas de OCR con ruido contra un roster sintético.
+
+Uso: python benchmarks/bench_coincidencias.py [usuarios] [lineas]
+"""
+import os
+import sys
+import random
+import string
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coincidencias import IndiceTrigramas
+
+CONFUSIONES = {"i": "1", "l": "1", "o": "0", "a": "4", "e": "3", "s": "5"}
+
+
+def roster_sintetico(total, rng):
+    nombres = set()
+    while len(nombres) < total:
+        largo = rng.randint(4, 12)
+        nombres.add(rng.choice(string.ascii_uppercase) + "".join(rng.choices(string.ascii_lowercase, k=largo)))
+    return sorted(nombres)
+
+
+def con_ruido(nombre, rng):
+    """Un error típico del OCR: una letra confundida, una perdida o basura alrededor."""
+    letras = list(nombre)
+    i = rng.randrange(len(letras))
+    tipo = rng.random()
+    if tipo < 0.4:
+        letras[i] = CONFUSIONES.get(letras[i].lower(), rng.choice(string.ascii_lowercase))
+    elif tipo < 0.7 and len(letras) > 4:
+        del letras[i]
+    else:
+        return f"{rng.choice(['Lv', '[', '*'])} {nombre}."
+    return "".join(letras)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    cantidad = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rng = random.Random(42)
+    nombres = roster_sintetico(total, rng)
+    muestra = rng.sample(nombres, cantidad)
+    lineas = [con_ruido(nombre, rng) for nombre in muestra]
+
+    indice = IndiceTrigramas()
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        indice.agregar(nombre)
+    armado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for nombre in muestra:
+        indice.quitar(nombre)
+        indice.agregar(nombre)
+    alta_baja = (time.perf_counter() - inicio) / (2 * cantidad)
+
+    inicio = time.perf_counter()
+    resultados = [indice.buscar(linea, minimo=0.5) for linea in lineas]
+    busqueda = time.perf_counter() - inicio
+
+    aciertos = sum(1 for esperado, r in zip(muestra, resultados) if r is not None and r[0] == esperado)
+    sin_match = sum(1 for r in resultados if r is None)
+    print(f"Usuarios: {total:,}  Líneas: {cantidad}")
+    print(f"Armado del índice:  {armado * 1000:8.2f} ms")
+    print(f"Alta o baja:        {alta_baja * 1e6:8.2f} µs por nombre")
+    print(f"Búsqueda:           {busqueda * 1000:8.2f} ms ({busqueda / cantidad * 1e6:.1f} µs por línea)")
+    print(f"Aciertos:           {aciertos}/{cantidad} ({sin_match} sin coincidencia)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compara el OCR de !asistencia contra el servidor de mock_ocr.py: el requests.post
+secuencial de antes, dentro del loop, frente a ocr.leer_imagen concurrente con gather.
+
+Además del tiempo total mide el mayor bloqueo del event loop: con el cliente
+síncrono el bot no atiende heartbeats ni otros comandos mientras espera.
+
+Uso: python benchmarks/bench_ocr.py [imagenes] [latencia_s] [tasa_fallos]
+"""
+import io
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+
+import requests
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_ocr import crear_app, iniciar_en_hilo
+
+def imagen(i):
+    # Un PNG real (el preprocesado lo decodifica) y distinto por captura: con la
+    # caché por hash, imágenes iguales harían un solo pedido.
+    ruido = random.Random(i).randbytes(256 * 256 * 3)
+    salida = io.BytesIO()
+    Image.frombytes("RGB", (256, 256), ruido).save(salida, format="PNG")
+    return salida.getvalue()
+
+
+async def medir_bloqueo(detener, intervalo=0.01):
+    """Mayor demora del loop en atender una tarea que se despierta cada `intervalo`."""
+    peor = 0.0
+    while not detener.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        peor = max(peor, time.perf_counter() - inicio - intervalo)
+    return peor
+
+
+async def secuencial(url, cantidad):
+    lineas = 0
+    for i in range(cantidad):
+        response = requests.post(
+            url,
+            files={"filename": (f"captura{i}.png", imagen(i))},
+            data={"apikey": "", "language": "spa", "OCREngine": "2", "filetype": "PNG"},
+            timeout=60
+        )
+        result = response.json()
+        lineas += len(result["ParsedResults"][0]["ParsedText"].splitlines())
+    return lineas, 0
+
+
+async def concurrente(cantidad):
+    import ocr
+    ocr._cache.clear()
+    resultados = await asyncio.gather(
+        *(ocr.leer_imagen(f"captura{i}.png", imagen(i)) for i in range(cantidad)), return_exceptions=True
+    )
+    await ocr.cerrar()
+    errores = sum(1 for r in resultados if isinstance(r, Exception))
+    return sum(len(r) for r in resultados if not isinstance(r, Exception)), errores
+
+
+async def correr(funcion, *args):
+    detener = asyncio.Event()
+    monitor = asyncio.create_task(medir_bloqueo(detener))
+    await asyncio.sleep(0)
+    inicio = time.perf_counter()
+    lineas, errores = await funcion(*args)
+    total = time.perf_counter() - inicio
+    detener.set()
+    return total, await monitor, lineas, errores
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    latencia = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    tasa_fallos = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+
+    url, detener_sin_fallos = iniciar_en_hilo(crear_app(latencia))
+    app_con_fallos = crear_app(latencia, tasa_fallos, semilla=1)
+    url_con_fallos, detener_con_fallos = iniciar_en_hilo(app_con_fallos)
+
+    os.environ["OCR_URL"] = url_con_fallos
+    logging.getLogger("ocr").setLevel(logging.ERROR)
+    os.environ.setdefault("OCR_ESPERA_BASE", "0.1")
+
+    print(f"Imágenes: {cantidad}  Latencia del OCR: {latencia * 1000:.0f} ms  Fallos: {tasa_fallos:.0%}")
+    total, bloqueo, lineas, _ = asyncio.run(correr(secuencial, url, cantidad))
+    print(f"requests secuencial:  {total * 1000:8.0f} ms  loop bloqueado hasta {bloqueo * 1000:6.0f} ms  ({lineas} líneas)")
+    total, bloqueo, lineas, errores = asyncio.run(correr(concurrente, cantidad))
+    print(f"aiohttp concurrente:  {total * 1000:8.0f} ms  loop bloqueado hasta {bloqueo * 1000:6.0f} ms  ({lineas} líneas, "
+          f"{errores} con error, {app_con_fallos['fallos']} fallos reintentados de {app_con_fallos['pedidos']} pedidos)")
+
+    detener_sin_fallos()
+    detener_con_fallos()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Tamaño subido y latencia del OCR por captura, con y sin el preprocesado de
+preprocesado.py, sobre capturas sintéticas contra el servidor de mock_ocr.py.
+
+Las capturas imitan una pantalla de juego a 2560x1440: fondo con ruido de color y
+una columna de nombres. El mock cobra una latencia fija más un tanto por MB subido.
+
+Uso: python benchmarks/bench_preprocesado.py [capturas] [s_por_mb]
+"""
+import io
+import os
+import sys
+import time
+import random
+import asyncio
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_ocr import crear_app, iniciar_en_hilo
+
+ANCHO, ALTO = 2560, 1440
+# Columna de nombres de las capturas sintéticas, en fracciones de la imagen.
+RECORTE = "0.05,0.1,0.35,0.95"
+
+
+def captura_sintetica(semilla, formato):
+    rng = random.Random(semilla)
+    ruido = Image.frombytes("RGB", (ANCHO // 4, ALTO // 4), rng.randbytes(ANCHO // 4 * ALTO // 4 * 3))
+    imagen = ruido.resize((ANCHO, ALTO), Image.BILINEAR)
+    dibujo = ImageDraw.Draw(imagen)
+    dibujo.rectangle((int(ANCHO * 0.05), int(ALTO * 0.1), int(ANCHO * 0.35), int(ALTO * 0.95)), fill=(20, 20, 30))
+    for fila in range(40):
+        y = int(ALTO * 0.11) + fila * 30
+        dibujo.text((int(ANCHO * 0.06), y), f"jugador{rng.randrange(300)}  Lv{rng.randrange(1, 60)}", fill=(230, 230, 230))
+    salida = io.BytesIO()
+    imagen.save(salida, format=formato, **({"quality": 92} if formato == "JPEG" else {}))
+    return salida.getvalue()
+
+
+async def correr(ocr, app, capturas, preprocesar):
+    ocr.OCR_PREPROCESAR = preprocesar
+    ocr._cache.clear()
+    subidos = app["bytes"]
+    latencias = []
+    for nombre, datos in capturas:
+        inicio = time.perf_counter()
+        await ocr.leer_imagen(nombre, datos)
+        latencias.append(time.perf_counter() - inicio)
+    return (app["bytes"] - subidos) / len(capturas), sum(latencias) / len(latencias)
+
+
+async def preprocesado_en_pool(ocr, capturas):
+    await ocr._preprocesar(*capturas[0])  # arranca el pool
+    inicio = time.perf_counter()
+    await asyncio.gather(*(ocr._preprocesar(nombre, datos) for nombre, datos in capturas))
+    return (time.perf_counter() - inicio) / len(capturas)
+
+
+async def main_async(ocr, app, capturas):
+    resultados = {}
+    for preprocesar in (False, True):
+        resultados[preprocesar] = await correr(ocr, app, capturas, preprocesar)
+    por_captura = await preprocesado_en_pool(ocr, capturas)
+    await ocr.cerrar()
+    return resultados, por_captura
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    por_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    app = crear_app(latencia=0.3, por_mb=por_mb)
+    url, detener = iniciar_en_hilo(app)
+    os.environ["OCR_URL"] = url
+    os.environ["OCR_RECORTE"] = RECORTE
+    import ocr
+
+    capturas = [
+        (f"captura{i}.{'jpg' if i % 2 else 'png'}", captura_sintetica(i, "JPEG" if i % 2 else "PNG"))
+        for i in range(cantidad)
+    ]
+    resultados, por_captura = asyncio.run(main_async(ocr, app, capturas))
+    detener()
+
+    print(f"Capturas: {cantidad} de {ANCHO}x{ALTO} (mitad PNG, mitad JPG)  Mock: 300 ms + {por_mb} s/MB")
+    for preprocesar, (tamano, latencia) in resultados.items():
+        etiqueta = "con preprocesado" if preprocesar else "sin preprocesado"
+        print(f"{etiqueta}:  {tamano / 1024:8.0f} KiB subidos  {latencia * 1000:7.0f} ms por captura")
+    print(f"Preprocesado en el pool: {por_captura * 1000:.0f} ms por captura (fuera del event loop)")
+
+
+if __name__ == "__main__":
+    main()
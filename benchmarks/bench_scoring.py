@@ -0,0 +1,97 @@
+"""Compara el puntaje de un evento con el bucle por usuario (versión anterior de
+handle_evento) frente a scoring.puntuar, sobre un roster sintético: los resultados
+deben coincidir y el costo debe ser del mismo orden.
+
+Uso: python benchmarks/bench_scoring.py [usuarios] [repeticiones]
+"""
+import os
+import sys
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scoring
+from data_manager import UserRecord
+
+EVENTO = "PVP"
+PUNTAJE = 5
+
+
+def roster_sintetico(total, ahora):
+    rng = random.Random(42)
+    usuarios = {}
+    for i in range(total):
+        usuarios[f"jugador{i}"] = UserRecord(
+            discord_id=i,
+            status="vacaciones" if rng.random() < 0.05 else "normal",
+            absence_until=ahora + timedelta(hours=rng.choice([-5, 5])) if rng.random() < 0.1 else None,
+            justified_events={EVENTO} if rng.random() < 0.1 else set()
+        )
+    asistentes = {nombre for nombre in usuarios if rng.random() < 0.7}
+    return usuarios, asistentes
+
+
+def puntuar_bucle(usuarios, asistentes, noresta, event_time):
+    """El algoritmo anterior, rama por rama: nombre -> (estado, delta, consume)."""
+    resultado = {}
+    for nombre, datos in usuarios.items():
+        if datos.status == "vacaciones":
+            resultado[nombre] = ("VACACIONES", 0, False)
+            continue
+        justificado_by_event = EVENTO in datos.justified_events
+        if noresta:
+            if nombre in asistentes:
+                resultado[nombre] = ("ASISTIÓ", PUNTAJE, justificado_by_event)
+            else:
+                resultado[nombre] = ("NO ASISTIÓ", 0, False)
+            continue
+        absence_until = datos.absence_until
+        justificado_evento = bool(absence_until and event_time <= absence_until) or justificado_by_event
+        if nombre in asistentes:
+            resultado[nombre] = ("ASISTIÓ", PUNTAJE, justificado_by_event)
+        elif justificado_evento:
+            resultado[nombre] = ("JUSTIFICADO", -PUNTAJE, justificado_by_event)
+        else:
+            resultado[nombre] = ("NO ASISTIÓ", -2 * PUNTAJE, False)
+    return resultado
+
+
+def puntuar_scoring(usuarios, asistentes, noresta, event_time):
+    return scoring.puntuar(usuarios, EVENTO, asistentes, PUNTAJE, noresta, event_time)
+
+
+def como_dict(filas):
+    return {nombre: (scoring.NOMBRES_ESTADO[codigo], delta, consume) for nombre, codigo, delta, consume in filas}
+
+
+def medir(funcion, repeticiones, *args):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    ahora = datetime.utcnow()
+    usuarios, asistentes = roster_sintetico(total, ahora)
+
+    print(f"Usuarios: {total:,}  Repeticiones: {repeticiones} (mejor tiempo)")
+    for noresta in (False, True):
+        esperado = puntuar_bucle(usuarios, asistentes, noresta, ahora)
+        obtenido = como_dict(puntuar_scoring(usuarios, asistentes, noresta, ahora))
+        assert esperado == obtenido, "scoring.puntuar no coincide con el bucle"
+
+        bucle = medir(puntuar_bucle, repeticiones, usuarios, asistentes, noresta, ahora)
+        pasada = medir(puntuar_scoring, repeticiones, usuarios, asistentes, noresta, ahora)
+        print(f"noresta={noresta!s:<5}  bucle anterior: {bucle:7.2f} ms  scoring.puntuar: {pasada:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compara la memoria residente del historial de DKP como dicts por fila
+(formato anterior) frente a HistoryEntry con __slots__.
+
+Uso: python benchmarks/memoria_historial.py [filas] [usuarios]
+"""
+import os
+import sys
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import HistoryEntry
+
+RAZONES = ["ASISTIÓ", "ASISTIÓ (noresta)", "JUSTIFICADO", "NO ASISTIÓ"]
+EVENTOS = ["PVP", "BOSS", "CASTILLO", "ARCHBOSS", "SIEGE"]
+
+
+def filas_sinteticas(total, usuarios):
+    base = datetime(2024, 1, 1)
+    for i in range(total):
+        evento = i // usuarios
+        # Igual que al leer de la base: cada fila trae sus propias cadenas.
+        yield (
+            f"jugador{i % usuarios}",
+            (base + timedelta(hours=evento)).isoformat(),
+            (-1) ** i * (i % 45),
+            f"Evento {EVENTOS[evento % len(EVENTOS)]}: {RAZONES[i % len(RAZONES)]}",
+        )
+
+
+def como_dicts(total, usuarios):
+    historial = {}
+    for i, (user, ts, delta, razon) in enumerate(filas_sinteticas(total, usuarios)):
+        entry = {"id": i, "user_name": user, "timestamp": datetime.fromisoformat(ts), "delta": delta, "razon": razon}
+        historial.setdefault(user, []).append(entry)
+    return historial
+
+
+def como_slots(total, usuarios):
+    historial = {}
+    fechas = {}
+    for user, ts, delta, razon in filas_sinteticas(total, usuarios):
+        fecha = fechas.get(ts)
+        if fecha is None:
+            fecha = fechas[ts] = datetime.fromisoformat(ts)
+        historial.setdefault(user, []).append(HistoryEntry(fecha, delta, razon))
+    return historial
+
+
+def medir(constructor, total, usuarios):
+    gc.collect()
+    tracemalloc.start()
+    historial = constructor(total, usuarios)
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del historial
+    return actual
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    usuarios = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    antes = medir(como_dicts, total, usuarios)
+    despues = medir(como_slots, total, usuarios)
+    print(f"Filas: {total:,}  Usuarios: {usuarios}")
+    print(f"dict por fila:  {antes / 2**20:8.1f} MiB  ({antes / total:6.1f} B/fila)")
+    print(f"HistoryEntry:   {despues / 2**20:8.1f} MiB  ({despues / total:6.1f} B/fila)")
+    print(f"Reducción:      {100 * (1 - despues / antes):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Servidor local que imita la API de OCR.Space para probar !asistencia sin red.
+
+Responde a POST /parse/image con el mismo JSON que OCR.Space, tras una latencia
+fija más un tanto por MB subido (transferencia y reconocimiento crecen con la
+imagen), y falla con 503 en una fracción de los pedidos para ejercitar los reintentos.
+Cada imagen "contiene" los nombres jugador0..N.
+
+Uso: python benchmarks/mock_ocr.py [puerto] [latencia_s] [tasa_fallos] [s_por_mb]
+y luego OCR_URL=http://127.0.0.1:<puerto>/parse/image al arrancar el bot.
+"""
+import sys
+import random
+import asyncio
+import threading
+
+from aiohttp import web
+
+NOMBRES_POR_IMAGEN = 40
+
+
+def crear_app(latencia=0.5, tasa_fallos=0.0, semilla=None, por_mb=0.0):
+    rng = random.Random(semilla)
+    # OCR.Space acepta archivos de varios MB; el límite por defecto de aiohttp es 1 MiB.
+    app = web.Application(client_max_size=32 * 2**20)
+    app["pedidos"] = 0
+    app["fallos"] = 0
+    app["bytes"] = 0
+
+    async def parse_image(request):
+        app["pedidos"] += 1
+        formulario = await request.post()
+        archivo = formulario.get("filename")
+        tamano = len(archivo.file.read()) if hasattr(archivo, "file") else 0
+        app["bytes"] += tamano
+        await asyncio.sleep(latencia + por_mb * tamano / 2**20)
+        if rng.random() < tasa_fallos:
+            app["fallos"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        nombre = getattr(archivo, "filename", "imagen.png")
+        texto = "\r\n".join(f"jugador{i}" for i in range(NOMBRES_POR_IMAGEN))
+        return web.json_response({
+            "ParsedResults": [{"ParsedText": texto, "FileParseExitCode": 1}],
+            "IsErroredOnProcessing": False,
+            "ProcessingTimeInMilliseconds": str(int(latencia * 1000)),
+            "SearchablePDFURL": f"mock://{nombre}"
+        })
+
+    app.router.add_post("/parse/image", parse_image)
+    return app
+
+
+def iniciar_en_hilo(app, puerto=0):
+    """Levanta `app` en un hilo con su propio loop y devuelve (url, detener)."""
+    listo = threading.Event()
+    estado = {}
+
+    def correr():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        sitio = web.TCPSite(runner, "127.0.0.1", puerto)
+        loop.run_until_complete(sitio.start())
+        estado["puerto"] = sitio._server.sockets[0].getsockname()[1]
+        estado["loop"] = loop
+        listo.set()
+        loop.run_forever()
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
+
+    hilo = threading.Thread(target=correr, daemon=True)
+    hilo.start()
+    listo.wait()
+
+    def detener():
+        estado["loop"].call_soon_threadsafe(estado["loop"].stop)
+        hilo.join()
+
+    return f"http://127.0.0.1:{estado['puerto']}/parse/image", detener
+
+
+def main():
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else 8089
+    latencia = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    tasa_fallos = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    por_mb = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    web.run_app(crear_app(latencia, tasa_fallos, por_mb=por_mb), host="127.0.0.1", port=puerto)
+
+
+if __name__ == "__main__":
+    main()
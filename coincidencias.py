@@ -0,0 +1,154 @@
+import unicodedata
+from collections import Counter, deque
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin acentos y solo letras o dígitos: lo que sobrevive al ruido del OCR."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if c.isalnum())
+
+
+def trigramas(texto: str) -> set:
+    # El relleno hace que los extremos del nombre pesen: "  a", " ab", ..., "yz ".
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> nombres para buscar el nombre más parecido a un
+    texto. Se actualiza nombre por nombre al agregar o quitar usuarios.
+
+    La confianza es el coeficiente de Dice entre los trigramas del texto y los del
+    nombre: 1.0 es idéntico una vez normalizado, 0.0 no comparten nada."""
+
+    def __init__(self):
+        self._postings = {}
+        self._trigramas = {}
+        self._por_normalizado = {}
+
+    def __len__(self):
+        return len(self._trigramas)
+
+    def __contains__(self, nombre):
+        return nombre in self._trigramas
+
+    def agregar(self, nombre: str):
+        if nombre in self._trigramas:
+            return
+        normalizado = normalizar(nombre)
+        grams = trigramas(normalizado)
+        self._trigramas[nombre] = grams
+        self._por_normalizado.setdefault(normalizado, set()).add(nombre)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(nombre)
+
+    def quitar(self, nombre: str):
+        grams = self._trigramas.pop(nombre, None)
+        if grams is None:
+            return
+        for gram in grams:
+            nombres = self._postings[gram]
+            nombres.discard(nombre)
+            if not nombres:
+                del self._postings[gram]
+        normalizado = normalizar(nombre)
+        iguales = self._por_normalizado[normalizado]
+        iguales.discard(nombre)
+        if not iguales:
+            del self._por_normalizado[normalizado]
+
+    def clear(self):
+        self._postings.clear()
+        self._trigramas.clear()
+        self._por_normalizado.clear()
+
+    def buscar(self, texto: str, minimo: float = 0.0):
+        """(nombre, confianza) del nombre más parecido a `texto`, o None si ninguno
+        llega a `minimo`."""
+        normalizado = normalizar(texto)
+        if not normalizado:
+            return None
+        iguales = self._por_normalizado.get(normalizado)
+        if iguales:
+            return min(iguales), 1.0
+
+        grams = trigramas(normalizado)
+        compartidos = Counter()
+        for gram in grams:
+            nombres = self._postings.get(gram)
+            if nombres:
+                compartidos.update(nombres)
+        mejor = None
+        # Un nombre que comparte c trigramas tiene al menos c, así que su confianza no
+        # pasa de 2c / (len(grams) + c): recorriendo por c descendente se corta temprano.
+        for nombre, comunes in compartidos.most_common():
+            tope = 2 * comunes / (len(grams) + comunes)
+            if mejor is not None and tope < mejor[1]:
+                break
+            confianza = 2 * comunes / (len(grams) + len(self._trigramas[nombre]))
+            if mejor is None or confianza > mejor[1] or (confianza == mejor[1] and nombre < mejor[0]):
+                mejor = (nombre, confianza)
+        if mejor is None or mejor[1] < minimo:
+            return None
+        return mejor
+
+
+class AutomataAlias:
+    """Autómata de Aho-Corasick sobre los patrones de alias: resuelve una línea en
+    una sola pasada sin importar cuántos alias haya. Si aparecen varios patrones,
+    gana el primero en el orden de definición. Se reconstruye entero al cambiar."""
+
+    def __init__(self, alias=None):
+        self.construir(alias or {})
+
+    def construir(self, alias):
+        """`alias`: patrón -> nombre, en orden de prioridad. Los patrones se comparan en minúsculas."""
+        transiciones = [{}]
+        # (prioridad, nombre) del mejor patrón que termina en cada nodo.
+        salida = [None]
+        for prioridad, (patron, nombre) in enumerate(alias.items()):
+            nodo = 0
+            for c in patron.lower():
+                siguiente = transiciones[nodo].get(c)
+                if siguiente is None:
+                    siguiente = transiciones[nodo][c] = len(transiciones)
+                    transiciones.append({})
+                    salida.append(None)
+                nodo = siguiente
+            if salida[nodo] is None or prioridad < salida[nodo][0]:
+                salida[nodo] = (prioridad, nombre)
+
+        fallo = [0] * len(transiciones)
+        cola = deque(transiciones[0].values())
+        while cola:
+            nodo = cola.popleft()
+            for c, hijo in transiciones[nodo].items():
+                f = fallo[nodo]
+                while f and c not in transiciones[f]:
+                    f = fallo[f]
+                fallo[hijo] = transiciones[f].get(c, 0)
+                # Un patrón que termina en el nodo de fallo también termina aquí.
+                heredada = salida[fallo[hijo]]
+                if heredada is not None and (salida[hijo] is None or heredada[0] < salida[hijo][0]):
+                    salida[hijo] = heredada
+                cola.append(hijo)
+
+        self._transiciones = transiciones
+        self._fallo = fallo
+        self._salida = salida
+
+    def buscar(self, linea: str):
+        """Nombre del alias de mayor prioridad que aparece en `linea`, o None."""
+        transiciones = self._transiciones
+        fallo = self._fallo
+        salida = self._salida
+        nodo = 0
+        mejor = None
+        for c in linea.lower():
+            while nodo and c not in transiciones[nodo]:
+                nodo = fallo[nodo]
+            nodo = transiciones[nodo].get(c, 0)
+            encontrada = salida[nodo]
+            if encontrada is not None and (mejor is None or encontrada[0] < mejor[0]):
+                mejor = encontrada
+        return mejor[1] if mejor is not None else None
@@ -0,0 +1,188 @@
+import os
+import asyncio
+import logging
+
+import discord
+
+import ocr
+from utils import MAX_EMBED_DESCRIPTION
+
+logger = logging.getLogger("cola_ocr")
+
+# Capturas leídas a la vez entre todos los !asistencia en curso.
+OCR_TRABAJADORES = int(os.getenv("OCR_TRABAJADORES", ocr.OCR_CONCURRENCIA))
+# Mínimo entre dos ediciones del mensaje de progreso, para no chocar con el límite de Discord.
+OCR_INTERVALO_PROGRESO = float(os.getenv("OCR_INTERVALO_PROGRESO", 1.0))
+# Cuánto espera detener() a que los trabajos cortados publiquen su resultado.
+ESPERA_AL_DETENER = 5.0
+
+# Trabajos con capturas sin asignar; cada trabajador toma una y devuelve el trabajo al final.
+_cola = asyncio.Queue()
+_trabajadores = []
+_informes = set()
+
+metricas = {
+    "trabajos": 0,
+    "trabajos_completados": 0,
+    "imagenes": 0,
+    "imagenes_pendientes": 0,
+    "errores": 0,
+}
+
+
+class TrabajoOCR:
+    """Las capturas de un !asistencia. Se reparten de a una entre los trabajadores
+    y cada una que termina se refleja en un único mensaje de progreso."""
+
+    def __init__(self, canal, adjuntos, al_terminar):
+        self.canal = canal
+        self.adjuntos = adjuntos
+        self.al_terminar = al_terminar
+        self.resultados = [None] * len(adjuntos)
+        self.leyendo = set()
+        self.siguiente = 0
+        self.terminadas = 0
+        self.cambio = asyncio.Event()
+        self.mensaje = None
+
+    def completo(self) -> bool:
+        return self.terminadas == len(self.adjuntos)
+
+    def embed(self) -> discord.Embed:
+        lineas = []
+        for indice, (adjunto, resultado) in enumerate(zip(self.adjuntos, self.resultados)):
+            if isinstance(resultado, ocr.ErrorOCR):
+                estado = f"error: {resultado}"
+            elif resultado is not None:
+                estado = f"{len(resultado)} líneas"
+            elif indice in self.leyendo:
+                estado = "leyendo..."
+            else:
+                estado = "en cola"
+            lineas.append(f"**{adjunto.filename}**: {estado}")
+        return discord.Embed(
+            title=f"Leyendo capturas ({self.terminadas}/{len(self.adjuntos)})",
+            description="\n".join(lineas)[:MAX_EMBED_DESCRIPTION],
+            color=discord.Color.green() if self.completo() else discord.Color.blue()
+        )
+
+
+async def _leer(adjunto):
+    try:
+        datos = await adjunto.read()
+        return await ocr.leer_imagen(adjunto.filename, datos)
+    except ocr.ErrorOCR as e:
+        return e
+    except discord.HTTPException as e:
+        return ocr.ErrorOCR(f"No se pudo descargar {adjunto.filename}: {e}")
+    except Exception:
+        logger.exception(f"Error inesperado al leer '{adjunto.filename}'.")
+        return ocr.ErrorOCR(f"Error inesperado al leer {adjunto.filename}.")
+
+
+def _cancelada(adjunto):
+    return ocr.ErrorOCR(f"Se detuvo el bot antes de leer {adjunto.filename}.")
+
+
+def _terminar(trabajo, indice, resultado):
+    trabajo.leyendo.discard(indice)
+    trabajo.resultados[indice] = resultado
+    trabajo.terminadas += 1
+    trabajo.cambio.set()
+    metricas["imagenes_pendientes"] -= 1
+    if isinstance(resultado, ocr.ErrorOCR):
+        metricas["errores"] += 1
+
+
+async def _procesar():
+    while True:
+        trabajo = await _cola.get()
+        indice = trabajo.siguiente
+        trabajo.siguiente += 1
+        if trabajo.siguiente < len(trabajo.adjuntos):
+            # Al final de la cola: las capturas de varios oficiales se intercalan.
+            _cola.put_nowait(trabajo)
+        trabajo.leyendo.add(indice)
+        trabajo.cambio.set()
+
+        # Si detener() corta la lectura, la captura queda con error y el trabajo
+        # igual puede completarse.
+        resultado = _cancelada(trabajo.adjuntos[indice])
+        try:
+            resultado = await _leer(trabajo.adjuntos[indice])
+        finally:
+            _terminar(trabajo, indice, resultado)
+
+
+async def _editar(trabajo):
+    try:
+        await trabajo.mensaje.edit(embed=trabajo.embed())
+    except discord.HTTPException:
+        logger.warning("No se pudo actualizar el mensaje de progreso del OCR.", exc_info=True)
+
+
+async def _informar(trabajo):
+    try:
+        while True:
+            await trabajo.cambio.wait()
+            trabajo.cambio.clear()
+            await _editar(trabajo)
+            if trabajo.completo():
+                break
+            await asyncio.sleep(OCR_INTERVALO_PROGRESO)
+        metricas["trabajos_completados"] += 1
+        await trabajo.al_terminar(trabajo.resultados)
+    except Exception:
+        logger.exception("Error al cerrar un trabajo de OCR.")
+
+
+def iniciar():
+    if _trabajadores and not all(t.done() for t in _trabajadores):
+        return
+    _trabajadores[:] = [asyncio.create_task(_procesar()) for _ in range(OCR_TRABAJADORES)]
+    logger.info(f"Cola de OCR iniciada con {OCR_TRABAJADORES} trabajadores.")
+
+
+async def detener():
+    """Corta las lecturas en curso. Las capturas sin leer quedan con un ErrorOCR,
+    así cada trabajo se completa y llama a su `al_terminar` antes de cerrar."""
+    for tarea in _trabajadores:
+        tarea.cancel()
+    await asyncio.gather(*_trabajadores, return_exceptions=True)
+    _trabajadores.clear()
+
+    while not _cola.empty():
+        trabajo = _cola.get_nowait()
+        for indice in range(trabajo.siguiente, len(trabajo.adjuntos)):
+            _terminar(trabajo, indice, _cancelada(trabajo.adjuntos[indice]))
+        trabajo.siguiente = len(trabajo.adjuntos)
+
+    informes = list(_informes)
+    if informes:
+        _, pendientes = await asyncio.wait(informes, timeout=ESPERA_AL_DETENER)
+        for tarea in pendientes:
+            tarea.cancel()
+        await asyncio.gather(*pendientes, return_exceptions=True)
+    _informes.clear()
+
+
+async def encolar(canal, adjuntos: list, al_terminar) -> TrabajoOCR:
+    """Publica el mensaje de progreso y pone las capturas en cola sin esperarlas.
+    Cuando terminan todas llama a `al_terminar(resultados)`, con las líneas de
+    cada captura o el ErrorOCR que dio, en el orden de `adjuntos`."""
+    iniciar()
+    trabajo = TrabajoOCR(canal, adjuntos, al_terminar)
+    trabajo.mensaje = await canal.send(embed=trabajo.embed())
+    informe = asyncio.create_task(_informar(trabajo))
+    _informes.add(informe)
+    informe.add_done_callback(_informes.discard)
+
+    metricas["trabajos"] += 1
+    metricas["imagenes"] += len(adjuntos)
+    metricas["imagenes_pendientes"] += len(adjuntos)
+    _cola.put_nowait(trabajo)
+    return trabajo
+
+
+def metricas_actuales() -> dict:
+    return {**metricas, "trabajos_activos": len(_informes)}
@@ -1,253 +1,1221 @@
-import os
-import json
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, text
-
-DATABASE_URL = os.getenv("DB_URL")
-if not DATABASE_URL:
-    raise ValueError("No se encontró DB_URL en las variables de entorno")
-
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
-AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-
-Base = declarative_base()
-
-class User(Base):
-    __tablename__ = "users"
-    id = Column(Integer, primary_key=True, index=True)
-    discord_id = Column(BigInteger, index=True)
-    name = Column(String(255), unique=True, index=True)
-    score = Column(Integer, default=0)
-    absence_until = Column(DateTime, nullable=True)
-    justified_events = Column(JSON, default=list)
-    status = Column(String(50), default="normal")
-    equipo = Column(JSON, default=dict)
-
-class Event(Base):
-    __tablename__ = "events"
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), unique=True, index=True)
-    timestamp = Column(DateTime)
-    puntaje = Column(Integer)
-    linked_users = Column(JSON, default=list)
-    late_users = Column(JSON, default=list)
-    penalties = Column(JSON, default=dict)
-
-class RegisteredEvent(Base):
-    __tablename__ = "registered_events"
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), unique=True, index=True)
-
-class ScoreHistoryEntry(Base):
-    __tablename__ = "score_history"
-    id = Column(Integer, primary_key=True, index=True)
-    user_name = Column(String(255), index=True)
-    timestamp = Column(DateTime)
-    delta = Column(Integer)
-    razon = Column(String(255))
-
-class Party(Base):
-    __tablename__ = "partys"
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), unique=True, index=True)
-    members = Column(JSON, default=list)
-
-user_data = {}
-events_info = {}
-registered_events = set()
-score_history = {}
-PARTYS = {}
-
-ZONA_HORARIA = ZoneInfo("America/Argentina/Buenos_Aires")
-
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-async def cargar_todos_los_datos():
-    await cargar_datos()
-    await cargar_eventos()
-    await cargar_eventos_registrados()
-    await cargar_historial_dkp()
-    await cargar_partys()
-
-async def cargar_datos():
-    global user_data
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(text("SELECT * FROM users"))
-        rows = result.fetchall()
-        user_data = {}
-        for row in rows:
-            user = dict(row._mapping)
-            if user["absence_until"]:
-                user["absence_until"] = datetime.fromisoformat(user["absence_until"]) if isinstance(user["absence_until"], str) else user["absence_until"]
-            if user.get("justified_events") is not None:
-                user["justified_events"] = set(json.loads(user["justified_events"]))
-            else:
-                user["justified_events"] = set()
-            if user.get("equipo") is not None:
-                user["equipo"] = json.loads(user["equipo"])
-            else:
-                user["equipo"] = {}
-            user_data[user["name"]] = dict(user)
-
-async def guardar_datos():
-    async with AsyncSessionLocal() as session:
-        for name, data in user_data.items():
-            result = await session.execute(text("SELECT * FROM users WHERE name = :name"), {"name": name})
-            existing = result.fetchone()
-            params = {
-                "discord_id": data.get("discord_id"),
-                "score": data.get("score"),
-                "absence_until": data.get("absence_until").isoformat() if data.get("absence_until") else None,
-                "justified_events": json.dumps(list(data.get("justified_events"))) if isinstance(data.get("justified_events"), set) else json.dumps(data.get("justified_events") or []),
-                "status": data.get("status"),
-                "equipo": json.dumps(data.get("equipo") or {}),
-                "name": name
-            }
-            if existing:
-                await session.execute(
-                    text("UPDATE users SET discord_id=:discord_id, score=:score, absence_until=:absence_until, justified_events=:justified_events, status=:status, equipo=:equipo WHERE name=:name"),
-                    params
-                )
-            else:
-                await session.execute(
-                    text("INSERT INTO users (discord_id, name, score, absence_until, justified_events, status, equipo) VALUES (:discord_id, :name, :score, :absence_until, :justified_events, :status, :equipo)"),
-                    params
-                )
-        await session.commit()
-
-async def cargar_eventos():
-    global events_info
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(text("SELECT * FROM events"))
-        rows = result.fetchall()
-        events_info = {}
-        for row in rows:
-            event = dict(row._mapping)
-            if event["timestamp"]:
-                event["timestamp"] = datetime.fromisoformat(event["timestamp"]) if isinstance(event["timestamp"], str) else event["timestamp"]
-            if event.get("linked_users") is not None:
-                event["linked_users"] = json.loads(event["linked_users"])
-            else:
-                event["linked_users"] = []
-            if event.get("late_users") is not None:
-                event["late_users"] = json.loads(event["late_users"])
-            else:
-                event["late_users"] = []
-            if event.get("penalties") is not None:
-                event["penalties"] = json.loads(event["penalties"])
-            else:
-                event["penalties"] = {}
-            events_info[event["name"]] = dict(event)
-
-async def guardar_eventos():
-    async with AsyncSessionLocal() as session:
-        for name, event in events_info.items():
-            result = await session.execute(text("SELECT * FROM events WHERE name = :name"), {"name": name})
-            existing = result.fetchone()
-            params = {
-                "name": name,
-                "timestamp": event["timestamp"].isoformat() if event.get("timestamp") else None,
-                "puntaje": event.get("puntaje"),
-                "linked_users": json.dumps(event.get("linked_users") or []),
-                "late_users": json.dumps(list(event.get("late_users") or [])),
-                "penalties": json.dumps(event.get("penalties") or {})
-            }
-            if existing:
-                await session.execute(
-                    text("UPDATE events SET timestamp=:timestamp, puntaje=:puntaje, linked_users=:linked_users, late_users=:late_users, penalties=:penalties WHERE name=:name"),
-                    params
-                )
-            else:
-                await session.execute(
-                    text("INSERT INTO events (name, timestamp, puntaje, linked_users, late_users, penalties) VALUES (:name, :timestamp, :puntaje, :linked_users, :late_users, :penalties)"),
-                    params
-                )
-        await session.commit()
-
-async def cargar_eventos_registrados():
-    global registered_events
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(text("SELECT * FROM registered_events"))
-        rows = result.fetchall()
-        registered_events = {dict(row._mapping)["name"] for row in rows}
-
-async def guardar_eventos_registrados():
-    async with AsyncSessionLocal() as session:
-        await session.execute(text("DELETE FROM registered_events"))
-        for name in registered_events:
-            await session.execute(
-                text("INSERT INTO registered_events (name) VALUES (:name)"),
-                {"name": name}
-            )
-        await session.commit()
-
-async def cargar_historial_dkp():
-    global score_history
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(text("SELECT * FROM score_history"))
-        rows = result.fetchall()
-        score_history = {}
-        for row in rows:
-            entry = dict(row._mapping)
-            entry["timestamp"] = datetime.fromisoformat(entry["timestamp"]) if isinstance(entry["timestamp"], str) else entry["timestamp"]
-            user = entry["user_name"]
-            if user not in score_history:
-                score_history[user] = []
-            score_history[user].append(dict(entry))
-
-async def cargar_partys():
-    global PARTYS
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(text("SELECT * FROM partys"))
-        rows = result.fetchall()
-        PARTYS = {}
-        for row in rows:
-            party = dict(row._mapping)
-            if party.get("members") is not None:
-                PARTYS[party["name"]] = json.loads(party["members"])
-            else:
-                PARTYS[party["name"]] = []
-            
-async def save_partys():
-    async with AsyncSessionLocal() as session:
-        for name, members in PARTYS.items():
-            result = await session.execute(text("SELECT * FROM partys WHERE name = :name"), {"name": name})
-            existing = result.fetchone()
-            params = {
-                "name": name,
-                "members": json.dumps(members)
-            }
-            if existing:
-                await session.execute(
-                    text("UPDATE partys SET members=:members WHERE name=:name"),
-                    params
-                )
-            else:
-                await session.execute(
-                    text("INSERT INTO partys (name, members) VALUES (:name, :members)"),
-                    params
-                )
-        await session.commit()
-
-async def registrar_cambio_dkp(nombre_usuario, delta, razon=""):
-    global score_history
-    entry = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "delta": delta,
-        "razon": razon,
-        "user_name": nombre_usuario
-    }
-    if nombre_usuario not in score_history:
-        score_history[nombre_usuario] = []
-    score_history[nombre_usuario].append(entry)
-    async with AsyncSessionLocal() as session:
-        await session.execute(
-            text("INSERT INTO score_history (user_name, timestamp, delta, razon) VALUES (:user_name, :timestamp, :delta, :razon)"),
-            entry
-        )
-        await session.commit()
\ No newline at end of file
+import os
+import json
+import pickle
+import time
+import asyncio
+import bisect
+import sys
+import logging
+from contextlib import asynccontextmanager
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, JSON, Index, UniqueConstraint, false, text
+
+import migraciones
+from coincidencias import IndiceTrigramas, AutomataAlias
+
+DATABASE_URL = os.getenv("DB_URL")
+if not DATABASE_URL:
+    raise ValueError("No se encontró DB_URL en las variables de entorno")
+
+engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+Base = declarative_base()
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True, index=True)
+    discord_id = Column(BigInteger, unique=True, index=True)
+    name = Column(String(255), unique=True, index=True)
+    score = Column(Integer, default=0)
+    absence_until = Column(DateTime, nullable=True)
+    status = Column(String(50), default="normal")
+    equipo = Column(JSON, default=dict)
+
+class Event(Base):
+    __tablename__ = "events"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, index=True)
+    timestamp = Column(DateTime)
+    puntaje = Column(Integer)
+    revertido = Column(Boolean, nullable=False, default=False, server_default=false())
+
+class EventAttendance(Base):
+    """Asistencia de cada corrida de un evento. Los nombres de evento se repiten
+    (PVP, BOSS...), así que una corrida es (event_name, event_timestamp)."""
+    __tablename__ = "event_attendance"
+    id = Column(Integer, primary_key=True, index=True)
+    event_name = Column(String(255))
+    event_timestamp = Column(DateTime)
+    user_name = Column(String(255))
+    status = Column(String(50))
+    delta = Column(Integer, default=0)
+    justificacion_consumida = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        UniqueConstraint("event_name", "event_timestamp", "user_name", name="uq_event_attendance_corrida_user"),
+        Index("ix_event_attendance_user_status", "user_name", "status"),
+    )
+
+class UserJustification(Base):
+    __tablename__ = "user_justification"
+    id = Column(Integer, primary_key=True, index=True)
+    user_name = Column(String(255))
+    event_name = Column(String(255))
+
+    __table_args__ = (
+        UniqueConstraint("user_name", "event_name", name="uq_user_justification_user_event"),
+    )
+
+class RegisteredEvent(Base):
+    __tablename__ = "registered_events"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, index=True)
+
+class Alias(Base):
+    __tablename__ = "aliases"
+    id = Column(Integer, primary_key=True, index=True)
+    patron = Column(String(255), unique=True)
+    nombre = Column(String(255))
+
+class ScoreHistoryEntry(Base):
+    __tablename__ = "score_history"
+    id = Column(Integer, primary_key=True, index=True)
+    user_name = Column(String(255), index=True)
+    timestamp = Column(DateTime, index=True)
+    delta = Column(Integer)
+    razon = Column(Text)
+
+    __table_args__ = (
+        Index("ix_score_history_user_name_timestamp", "user_name", "timestamp"),
+    )
+
+class Party(Base):
+    __tablename__ = "partys"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, index=True)
+    members = Column(JSON, default=list)
+
+class UserRecord:
+    __slots__ = ("discord_id", "score", "absence_until", "justified_events", "status", "equipo")
+
+    def __init__(self, discord_id=None, score=0, absence_until=None, justified_events=None, status="normal", equipo=None):
+        self.discord_id = discord_id
+        self.score = score
+        self.absence_until = absence_until
+        self.justified_events = justified_events if justified_events is not None else set()
+        self.status = status
+        self.equipo = equipo if equipo is not None else {}
+
+ASISTIO = "ASISTIÓ"
+TARDE = "TARDE"
+JUSTIFICADO = "JUSTIFICADO"
+NO_ASISTIO = "NO ASISTIÓ"
+
+class EventRecord:
+    """Un evento y su asistencia: nombre -> (estado, delta de DKP aplicado)."""
+    __slots__ = ("timestamp", "puntaje", "asistencia")
+
+    def __init__(self, timestamp, puntaje, asistencia=None):
+        self.timestamp = timestamp
+        self.puntaje = puntaje
+        self.asistencia = asistencia if asistencia is not None else {}
+
+    def estado(self, nombre):
+        return self.asistencia.get(nombre, (None, 0))[0]
+
+    def penalizacion(self, nombre):
+        estado, delta = self.asistencia.get(nombre, (None, 0))
+        return -delta if estado == NO_ASISTIO and delta < 0 else 0
+
+class PlanEvento:
+    """Un evento puntuado y todavía sin aplicar: su registro, los cambios de DKP
+    (nombre, delta, razón) y los usuarios cuya justificación del evento se consume."""
+    __slots__ = ("nombre", "evento", "cambios", "justificaciones", "estados")
+
+    def __init__(self, nombre, evento, cambios=None, justificaciones=None, estados=None):
+        self.nombre = nombre
+        self.evento = evento
+        self.cambios = cambios if cambios is not None else []
+        self.justificaciones = justificaciones if justificaciones is not None else []
+        self.estados = estados if estados is not None else {}
+
+class HistoryEntry:
+    """Un cambio de DKP. El usuario es la clave de `score_history`, no se repite aquí."""
+    __slots__ = ("timestamp", "delta", "razon")
+
+    def __init__(self, timestamp, delta, razon):
+        self.timestamp = timestamp
+        self.delta = delta
+        self.razon = sys.intern(razon or "")
+
+class HistorialDKP:
+    """Historial de DKP por usuario. En memoria solo se guardan los últimos
+    `dias_ventana` días; los rangos más viejos se consultan a la base."""
+
+    def __init__(self, dias_ventana):
+        self.dias_ventana = dias_ventana
+        self.desde = None
+        self._recientes = {}
+
+    def inicio_ventana(self):
+        return datetime.utcnow() - timedelta(days=self.dias_ventana)
+
+    def agregar(self, nombre, entry):
+        if self.desde is not None and entry.timestamp < self.desde:
+            return
+        historial = self._recientes.setdefault(nombre, [])
+        if historial and entry.timestamp < historial[-1].timestamp:
+            # Eventos cargados a posteriori: se mantiene el orden por fecha. Sin el
+            # key= de bisect, que pide Python 3.10.
+            i = bisect.bisect_right([e.timestamp for e in historial], entry.timestamp)
+            historial.insert(i, entry)
+        else:
+            historial.append(entry)
+        marcar_modificado()
+
+    def recientes(self, nombre):
+        """Cambios de `nombre` dentro de la ventana en memoria, del más viejo al más nuevo."""
+        return self._recientes.get(nombre, [])
+
+    def recortar(self):
+        """Descarta de memoria las entradas que quedaron fuera de la ventana."""
+        inicio = self.inicio_ventana()
+        self.desde = max(self.desde, inicio) if self.desde is not None else inicio
+        descartadas = 0
+        for nombre in list(self._recientes):
+            historial = self._recientes[nombre]
+            i = 0
+            while i < len(historial) and historial[i].timestamp < self.desde:
+                i += 1
+            if i == len(historial):
+                del self._recientes[nombre]
+            elif i:
+                del historial[:i]
+            descartadas += i
+        if descartadas:
+            marcar_modificado()
+        return descartadas
+
+    async def consultar(self, nombre, desde=None, hasta=None):
+        """Cambios de `nombre` con `desde <= timestamp < hasta`. Si el rango cae
+        dentro de la ventana se responde desde memoria; si no, desde la base."""
+        if desde is not None and self.desde is not None and desde >= self.desde:
+            return [
+                entry for entry in self.recientes(nombre)
+                if entry.timestamp >= desde and (hasta is None or entry.timestamp < hasta)
+            ]
+
+        condiciones = ["user_name = :nombre"]
+        params = {"nombre": nombre}
+        if desde is not None:
+            condiciones.append("timestamp >= :desde")
+            params["desde"] = desde.isoformat()
+        if hasta is not None:
+            condiciones.append("timestamp < :hasta")
+            params["hasta"] = hasta.isoformat()
+        consulta = text(
+            "SELECT timestamp, delta, razon FROM score_history "
+            f"WHERE {' AND '.join(condiciones)} ORDER BY timestamp, id"
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(consulta, params)
+            return [HistoryEntry(_fecha(timestamp), delta, razon) for timestamp, delta, razon in result]
+
+    def exportar(self):
+        return self.desde, self._recientes
+
+    def restaurar(self, desde, recientes):
+        self.desde = desde
+        self._recientes = recientes
+        self.recortar()
+        marcar_modificado()
+
+    def clear(self):
+        self._recientes.clear()
+        self.desde = None
+        marcar_modificado()
+
+    def __contains__(self, nombre):
+        return nombre in self._recientes
+
+    def __len__(self):
+        return sum(len(historial) for historial in self._recientes.values())
+
+# Confianza mínima (0 a 1) para aceptar una coincidencia aproximada de nombre.
+COINCIDENCIA_MINIMA = float(os.getenv("COINCIDENCIA_MINIMA", 0.5))
+
+class UserStore(MutableMapping):
+    """Usuarios indexados por nombre, con índices secundarios por discord_id, por
+    nombre en minúsculas y por trigramas que se mantienen al insertar, renombrar y borrar."""
+
+    def __init__(self):
+        self._usuarios = {}
+        self._por_discord_id = {}
+        self._por_nombre_lower = {}
+        self._aproximado = IndiceTrigramas()
+
+    def __getitem__(self, name):
+        return self._usuarios[name]
+
+    def __setitem__(self, name, data):
+        if name in self._usuarios:
+            self._desindexar(name)
+        self._usuarios[name] = data
+        self._indexar(name)
+        self._aproximado.agregar(name)
+        marcar_modificado()
+
+    def __delitem__(self, name):
+        self._desindexar(name)
+        del self._usuarios[name]
+        self._aproximado.quitar(name)
+        marcar_modificado()
+
+    def __contains__(self, name):
+        return name in self._usuarios
+
+    def __iter__(self):
+        return iter(self._usuarios)
+
+    def __len__(self):
+        return len(self._usuarios)
+
+    def clear(self):
+        self._usuarios.clear()
+        self._por_discord_id.clear()
+        self._por_nombre_lower.clear()
+        self._aproximado.clear()
+        marcar_modificado()
+
+    def _indexar(self, name):
+        discord_id = self._usuarios[name].discord_id
+        if discord_id is not None:
+            self._por_discord_id[discord_id] = name
+        # Nombres que solo difieren en mayúsculas comparten clave; gana el primero.
+        self._por_nombre_lower.setdefault(name.lower(), {})[name] = None
+
+    def _desindexar(self, name):
+        # discord_id es único (migración 3): la entrada es de este usuario o de nadie.
+        discord_id = self._usuarios[name].discord_id
+        if discord_id is not None and self._por_discord_id.get(discord_id) == name:
+            del self._por_discord_id[discord_id]
+        lower = name.lower()
+        nombres = self._por_nombre_lower.get(lower)
+        if nombres is not None:
+            nombres.pop(name, None)
+            if not nombres:
+                del self._por_nombre_lower[lower]
+
+    def nombre_por_discord_id(self, discord_id):
+        return self._por_discord_id.get(discord_id)
+
+    def buscar_nombre(self, nombre):
+        if nombre in self._usuarios:
+            return nombre
+        nombres = self._por_nombre_lower.get(nombre.lower())
+        return next(iter(nombres)) if nombres else None
+
+    def buscar_aproximado(self, nombre, minimo=None):
+        """(nombre, confianza) del usuario que mejor coincide con `nombre`, o None
+        si ninguno llega a `minimo` (COINCIDENCIA_MINIMA por defecto)."""
+        exacto = self.buscar_nombre(nombre)
+        if exacto is not None:
+            return exacto, 1.0
+        return self._aproximado.buscar(nombre, COINCIDENCIA_MINIMA if minimo is None else minimo)
+
+    def renombrar(self, viejo, nuevo):
+        data = self._usuarios[viejo]
+        del self[viejo]
+        self[nuevo] = data
+
+    def actualizar_discord_id(self, name, discord_id):
+        self._desindexar(name)
+        self._usuarios[name].discord_id = discord_id
+        self._indexar(name)
+        marcar_modificado()
+
+# Sube con cada cambio del estado en memoria. Los cambios directos a un UserRecord
+# lo suben al encolarse para persistir; /api/users lo usa para no reconstruir la respuesta.
+version_estado = 0
+
+def marcar_modificado():
+    global version_estado
+    version_estado += 1
+
+user_data = UserStore()
+events_info = {}
+registered_events = set()
+score_history = HistorialDKP(int(os.getenv("HISTORIAL_VENTANA_DIAS", 14)))
+PARTYS = {}
+# Alias de OCR: texto en minúsculas -> nombre, en orden de prioridad (id en la base).
+aliases = {}
+automata_alias = AutomataAlias()
+
+ZONA_HORARIA = ZoneInfo("America/Argentina/Buenos_Aires")
+
+logger = logging.getLogger("data_manager")
+
+# Última versión confirmada en la base de cada fila: permite que un guardado
+# escriba solo las filas que cambiaron desde el último commit.
+_usuarios_persistidos = {}
+_eventos_persistidos = {}
+_partys_persistidas = {}
+_asistencias_persistidas = {}
+_justificaciones_persistidas = set()
+# El UserRecord que representa cada fila de users, para reconocer un nombre que
+# pasó a otro registro (borrado y vuelto a crear) antes de guardarse.
+_registros_persistidos = {}
+_lock_guardado = asyncio.Lock()
+
+# Un lock por usuario: serializa las lecturas y cambios de score de un mismo
+# usuario sin frenar los comandos sobre usuarios distintos.
+_locks_usuario = {}
+
+estadisticas_guardado = {}
+
+TAMANO_LOTE = 500
+
+COLUMNAS_USERS = ["name", "discord_id", "score", "absence_until", "status", "equipo"]
+COLUMNAS_EVENTS = ["name", "timestamp", "puntaje", "revertido"]
+COLUMNAS_PARTYS = ["name", "members"]
+COLUMNAS_ASISTENCIA = ["event_name", "event_timestamp", "user_name", "status", "delta"]
+CLAVES_ASISTENCIA = ("event_name", "event_timestamp", "user_name")
+
+# Columnas que un upsert solo escribe al insertar. El score de una fila existente
+# cambia únicamente con incrementos atómicos (ver apply_delta); la fila de un
+# usuario recreado se borra y se inserta de nuevo (ver _diferencias_usuarios).
+CONSERVAR_AL_ACTUALIZAR = {"users": ("score",)}
+
+# Un evento deja de admitir cambios (y sale de memoria) pasado este tiempo.
+VIGENCIA_EVENTO = timedelta(minutes=60)
+
+# Estado en memoria guardado al cerrar; si el contador de cambios de la base no
+# se movió desde entonces, el próximo arranque lo usa en lugar de leer las tablas.
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH")
+FORMATO_SNAPSHOT = 2
+# Solo True tras una carga completa: un snapshot de una memoria vacía o a medio
+# cargar tendría el contador al día y el próximo arranque no leería la base.
+datos_cargados = False
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # create_all no toca tablas que ya existen: índices, columnas y tipos nuevos
+    # llegan a las bases existentes por migraciones.
+    if await migraciones.aplicar_migraciones(engine):
+        async with AsyncSessionLocal() as session:
+            await _marcar_cambio(session)
+            await session.commit()
+
+async def _marcar_cambio(session):
+    """Avanza el contador de cambios; toda transacción que escribe lo llama antes del commit."""
+    await session.execute(text("UPDATE db_state SET cambios = cambios + 1 WHERE id = 1"))
+
+async def _contador_cambios():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT cambios FROM db_state WHERE id = 1"))
+        return result.scalar()
+
+async def cargar_todos_los_datos():
+    global datos_cargados
+    datos_cargados = False
+    inicio = time.perf_counter()
+    if SNAPSHOT_PATH and await cargar_snapshot():
+        datos_cargados = True
+        logger.info(f"Arranque en caliente desde {SNAPSHOT_PATH} en {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+        return
+    await asyncio.gather(
+        cargar_datos(),
+        cargar_eventos(),
+        cargar_eventos_registrados(),
+        cargar_historial_dkp(),
+        cargar_partys(),
+        cargar_aliases()
+    )
+    datos_cargados = True
+    logger.info(f"Arranque en frío desde la base en {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+
+def _leer_snapshot():
+    with open(SNAPSHOT_PATH, "rb") as f:
+        return pickle.load(f)
+
+def _escribir_snapshot(datos):
+    temporal = f"{SNAPSHOT_PATH}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(datos)
+    os.replace(temporal, SNAPSHOT_PATH)
+
+async def guardar_snapshot():
+    """Escribe el estado en memoria en SNAPSHOT_PATH. Solo es válido si no quedan
+    cambios sin persistir, por eso se llama al cerrar, después de vaciar la cola.
+    No hace nada si los datos no terminaron de cargarse."""
+    if not SNAPSHOT_PATH:
+        return
+    if not datos_cargados:
+        logger.warning("Los datos no terminaron de cargarse; no se guarda el snapshot.")
+        return
+    inicio = time.perf_counter()
+    historial_desde, historial = score_history.exportar()
+    estado = {
+        "formato": FORMATO_SNAPSHOT,
+        "cambios": await _contador_cambios(),
+        "users": dict(user_data.items()),
+        "events": events_info,
+        "registered_events": registered_events,
+        "historial_desde": historial_desde,
+        "historial": historial,
+        "partys": PARTYS,
+        "aliases": aliases
+    }
+    datos = pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)
+    await asyncio.to_thread(_escribir_snapshot, datos)
+    logger.info(f"Snapshot guardado en {SNAPSHOT_PATH} ({len(datos) / 1024:.0f} KiB) en {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+
+async def cargar_snapshot():
+    """Restaura el estado desde SNAPSHOT_PATH si sigue al día con la base."""
+    if not os.path.exists(SNAPSHOT_PATH):
+        return False
+    try:
+        estado = await asyncio.to_thread(_leer_snapshot)
+    except Exception:
+        logger.exception(f"No se pudo leer {SNAPSHOT_PATH}; se carga desde la base.")
+        return False
+    if estado.get("formato") != FORMATO_SNAPSHOT:
+        logger.info("El snapshot es de otro formato; se carga desde la base.")
+        return False
+    cambios = await _contador_cambios()
+    if estado["cambios"] != cambios:
+        logger.info(f"El snapshot está desactualizado ({estado['cambios']} != {cambios} cambios); se carga desde la base.")
+        return False
+
+    user_data.clear()
+    for name, record in estado["users"].items():
+        user_data[name] = record
+    events_info.clear()
+    events_info.update(estado["events"])
+    registered_events.clear()
+    registered_events.update(estado["registered_events"])
+    score_history.restaurar(estado["historial_desde"], estado["historial"])
+    PARTYS.clear()
+    PARTYS.update(estado["partys"])
+    aliases.clear()
+    aliases.update(estado["aliases"])
+    automata_alias.construir(aliases)
+
+    # La base coincide con la memoria: lo persistido es lo actual.
+    _usuarios_persistidos.clear()
+    _usuarios_persistidos.update((name, _params_usuario(name, data)) for name, data in user_data.items())
+    _registros_persistidos.clear()
+    _registros_persistidos.update(user_data.items())
+    _justificaciones_persistidas.clear()
+    _justificaciones_persistidas.update(_diferencias_justificaciones()[0])
+    _eventos_persistidos.clear()
+    _eventos_persistidos.update((name, _params_evento(name, event)) for name, event in events_info.items())
+    _asistencias_persistidas.clear()
+    _confirmar_asistencia(_diferencias_asistencia()[0], [])
+    _partys_persistidas.clear()
+    _partys_persistidas.update((name, _params_party(name, members)) for name, members in PARTYS.items())
+    return True
+
+def _fecha(valor):
+    return datetime.fromisoformat(valor) if isinstance(valor, str) else valor
+
+async def cargar_datos():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT * FROM users"))
+        rows = result.fetchall()
+        user_data.clear()
+        _usuarios_persistidos.clear()
+        _registros_persistidos.clear()
+        for row in rows:
+            user = row._mapping
+            record = UserRecord(
+                discord_id=user["discord_id"],
+                score=user["score"] or 0,
+                absence_until=_fecha(user["absence_until"]) if user["absence_until"] else None,
+                status=user["status"] or "normal",
+                equipo=json.loads(user["equipo"]) if user["equipo"] is not None else {}
+            )
+            user_data[user["name"]] = record
+            _usuarios_persistidos[user["name"]] = _params_usuario(user["name"], record)
+            _registros_persistidos[user["name"]] = record
+
+        result = await session.execute(text("SELECT user_name, event_name FROM user_justification"))
+        _justificaciones_persistidas.clear()
+        for user, evento in result:
+            if user in user_data:
+                user_data[user].justified_events.add(evento)
+                _justificaciones_persistidas.add((user, evento))
+
+def _params_usuario(name, data):
+    return {
+        "discord_id": data.discord_id,
+        "score": data.score,
+        "absence_until": data.absence_until.isoformat() if data.absence_until else None,
+        "status": data.status,
+        "equipo": json.dumps(data.equipo, sort_keys=True),
+        "name": name
+    }
+
+def _params_evento(name, event):
+    return {
+        "name": name,
+        "timestamp": event.timestamp.isoformat() if event.timestamp else None,
+        "puntaje": event.puntaje,
+        # Volver a cargar un evento revertido con el mismo nombre lo reactiva.
+        "revertido": False
+    }
+
+def _params_asistencia(evento, timestamp, nombre, estado, delta):
+    return {
+        "event_name": evento,
+        "event_timestamp": timestamp.isoformat() if timestamp else None,
+        "user_name": nombre,
+        "status": estado,
+        "delta": delta
+    }
+
+def _params_party(name, members):
+    return {
+        "name": name,
+        "members": json.dumps(members)
+    }
+
+def _registrar_flush(tabla, filas, inicio):
+    ms = (time.perf_counter() - inicio) * 1000
+    stats = estadisticas_guardado.setdefault(tabla, {
+        "flushes": 0,
+        "filas_escritas": 0,
+        "ultimas_filas": 0,
+        "ultimo_ms": 0.0,
+        "total_ms": 0.0
+    })
+    stats["flushes"] += 1
+    stats["filas_escritas"] += filas
+    stats["ultimas_filas"] = filas
+    stats["ultimo_ms"] = ms
+    stats["total_ms"] += ms
+    if filas:
+        logger.info(f"Guardado de '{tabla}': {filas} fila(s) en {ms:.1f} ms.")
+
+def _diferencias(actuales, persistidas, borrar=True):
+    cambiadas = [params for name, params in actuales.items() if persistidas.get(name) != params]
+    borradas = [name for name in persistidas if name not in actuales] if borrar else []
+    return cambiadas, borradas
+
+def _confirmar_diferencias(persistidas, cambiadas, borradas):
+    for params in cambiadas:
+        persistidas[params["name"]] = params
+    for name in borradas:
+        persistidas.pop(name, None)
+
+def _diferencias_usuarios():
+    """Como _diferencias para users. Un nombre cuyo registro ya no es el de su fila
+    (se borró y se volvió a crear, o se renombró otro usuario a ese nombre) se borra
+    y se inserta entero: un upsert no escribiría su score. Devuelve también los
+    registros de las filas cambiadas, para _confirmar_usuarios."""
+    cambiadas, borradas = _diferencias(
+        {name: _params_usuario(name, data) for name, data in user_data.items()},
+        _usuarios_persistidos
+    )
+    escritas = {params["name"] for params in cambiadas}
+    for name, record in _registros_persistidos.items():
+        if name in user_data and user_data[name] is not record:
+            borradas.append(name)
+            if name not in escritas:
+                cambiadas.append(_params_usuario(name, user_data[name]))
+    return cambiadas, borradas, {params["name"]: user_data[params["name"]] for params in cambiadas}
+
+def _confirmar_usuarios(cambiadas, borradas, registros):
+    for name in borradas:
+        _usuarios_persistidos.pop(name, None)
+        _registros_persistidos.pop(name, None)
+    for params in cambiadas:
+        _usuarios_persistidos[params["name"]] = params
+    _registros_persistidos.update(registros)
+
+def _sql_upsert(tabla, columnas, claves=("name",), actualizar=True):
+    """INSERT ... ON CONFLICT DO UPDATE (o DO NOTHING), válido en SQLite (>= 3.24) y PostgreSQL."""
+    valores = ", ".join(f":{c}" for c in columnas)
+    conservar = set(claves) | set(CONSERVAR_AL_ACTUALIZAR.get(tabla, ()))
+    conflicto = "DO NOTHING"
+    if actualizar:
+        conflicto = "DO UPDATE SET " + ", ".join(f"{c}=excluded.{c}" for c in columnas if c not in conservar)
+    return text(
+        f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({valores}) "
+        f"ON CONFLICT({', '.join(claves)}) {conflicto}"
+    )
+
+async def _upsert_masivo(session, tabla, columnas, filas, claves=("name",), actualizar=True):
+    sentencia = _sql_upsert(tabla, columnas, claves, actualizar)
+    for i in range(0, len(filas), TAMANO_LOTE):
+        await session.execute(sentencia, filas[i:i + TAMANO_LOTE])
+
+async def _escribir_diferencias(session, tabla, columnas, cambiadas, borradas):
+    # Primero los borrados: un renombre no debe chocar con el índice único de discord_id.
+    if borradas:
+        await session.execute(
+            text(f"DELETE FROM {tabla} WHERE name = :name"),
+            [{"name": name} for name in borradas]
+        )
+    if cambiadas:
+        await _upsert_masivo(session, tabla, columnas, cambiadas)
+
+async def _guardar_tabla(tabla, columnas, actuales, persistidas, borrar=True):
+    async with _lock_guardado:
+        inicio = time.perf_counter()
+        cambiadas, borradas = _diferencias(actuales, persistidas, borrar)
+        if cambiadas or borradas:
+            async with AsyncSessionLocal() as session:
+                await _escribir_diferencias(session, tabla, columnas, cambiadas, borradas)
+                await _marcar_cambio(session)
+                await session.commit()
+            _confirmar_diferencias(persistidas, cambiadas, borradas)
+        _registrar_flush(tabla, len(cambiadas) + len(borradas), inicio)
+
+def _diferencias_justificaciones():
+    actuales = {(name, evento) for name, data in user_data.items() for evento in data.justified_events}
+    return actuales - _justificaciones_persistidas, _justificaciones_persistidas - actuales
+
+async def _escribir_justificaciones(session, nuevas, quitadas):
+    if nuevas:
+        await _upsert_masivo(
+            session, "user_justification", ["user_name", "event_name"],
+            [{"user_name": user, "event_name": evento} for user, evento in nuevas],
+            claves=("user_name", "event_name"), actualizar=False
+        )
+    if quitadas:
+        await session.execute(
+            text("DELETE FROM user_justification WHERE user_name = :user_name AND event_name = :event_name"),
+            [{"user_name": user, "event_name": evento} for user, evento in quitadas]
+        )
+
+def _confirmar_justificaciones(nuevas, quitadas):
+    _justificaciones_persistidas.update(nuevas)
+    _justificaciones_persistidas.difference_update(quitadas)
+
+def _diferencias_asistencia():
+    """Filas de asistencia que cambiaron, de la corrida de cada evento en memoria.
+    Solo se borran filas de esas corridas; las de corridas anteriores y eventos
+    expirados quedan en la base."""
+    actuales = {
+        (evento, nombre): _params_asistencia(evento, info.timestamp, nombre, estado, delta)
+        for evento, info in events_info.items()
+        for nombre, (estado, delta) in info.asistencia.items()
+    }
+    cambiadas = [params for clave, params in actuales.items() if _asistencias_persistidas.get(clave) != params]
+    borradas = [
+        params for clave, params in _asistencias_persistidas.items()
+        if clave[0] in events_info and clave not in actuales
+    ]
+    return cambiadas, borradas
+
+async def _escribir_asistencia(session, cambiadas, borradas):
+    if cambiadas:
+        await _upsert_masivo(
+            session, "event_attendance", COLUMNAS_ASISTENCIA, cambiadas,
+            claves=CLAVES_ASISTENCIA
+        )
+    if borradas:
+        await session.execute(
+            text(
+                "DELETE FROM event_attendance WHERE event_name = :event_name "
+                "AND event_timestamp = :event_timestamp AND user_name = :user_name"
+            ),
+            [{clave: params[clave] for clave in CLAVES_ASISTENCIA} for params in borradas]
+        )
+
+def _confirmar_asistencia(cambiadas, borradas):
+    for params in cambiadas:
+        _asistencias_persistidas[(params["event_name"], params["user_name"])] = params
+    for params in borradas:
+        _asistencias_persistidas.pop((params["event_name"], params["user_name"]), None)
+    for clave in [clave for clave in _asistencias_persistidas if clave[0] not in events_info]:
+        del _asistencias_persistidas[clave]
+
+async def guardar_datos():
+    """Guarda los usuarios modificados junto con sus justificaciones."""
+    async with _lock_guardado:
+        inicio = time.perf_counter()
+        cambiadas, borradas, registros = _diferencias_usuarios()
+        nuevas, quitadas = _diferencias_justificaciones()
+        if cambiadas or borradas or nuevas or quitadas:
+            async with AsyncSessionLocal() as session:
+                await _escribir_diferencias(session, "users", COLUMNAS_USERS, cambiadas, borradas)
+                await _escribir_justificaciones(session, nuevas, quitadas)
+                await _marcar_cambio(session)
+                await session.commit()
+            _confirmar_usuarios(cambiadas, borradas, registros)
+            _confirmar_justificaciones(nuevas, quitadas)
+        _registrar_flush("users", len(cambiadas) + len(borradas) + len(nuevas) + len(quitadas), inicio)
+
+async def cargar_eventos():
+    """Carga solo los eventos vigentes con su asistencia."""
+    desde = {"desde": (datetime.utcnow() - VIGENCIA_EVENTO).isoformat()}
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("SELECT name, timestamp, puntaje FROM events WHERE timestamp >= :desde AND revertido = :no"),
+            {**desde, "no": False}
+        )
+        rows = result.fetchall()
+        events_info.clear()
+        _eventos_persistidos.clear()
+        for name, timestamp, puntaje in rows:
+            record = EventRecord(timestamp=_fecha(timestamp) if timestamp else None, puntaje=puntaje)
+            events_info[name] = record
+            _eventos_persistidos[name] = _params_evento(name, record)
+
+        result = await session.execute(text(
+            "SELECT a.event_name, a.user_name, a.status, a.delta FROM event_attendance a "
+            "JOIN events e ON e.name = a.event_name AND e.timestamp = a.event_timestamp WHERE e.timestamp >= :desde"
+        ), desde)
+        _asistencias_persistidas.clear()
+        for evento, nombre, estado, delta in result:
+            if evento in events_info:
+                events_info[evento].asistencia[nombre] = (estado, delta)
+                _asistencias_persistidas[(evento, nombre)] = _params_asistencia(
+                    evento, events_info[evento].timestamp, nombre, estado, delta
+                )
+
+async def guardar_eventos():
+    """Guarda los eventos modificados y su asistencia fila por fila. Los eventos
+    expirados solo se quitan de memoria; sus filas quedan en la base."""
+    async with _lock_guardado:
+        inicio = time.perf_counter()
+        cambiados, _ = _diferencias(
+            {name: _params_evento(name, event) for name, event in events_info.items()},
+            _eventos_persistidos,
+            borrar=False
+        )
+        asistencias, asistencias_borradas = _diferencias_asistencia()
+        if cambiados or asistencias or asistencias_borradas:
+            async with AsyncSessionLocal() as session:
+                await _escribir_diferencias(session, "events", COLUMNAS_EVENTS, cambiados, [])
+                await _escribir_asistencia(session, asistencias, asistencias_borradas)
+                await _marcar_cambio(session)
+                await session.commit()
+            _confirmar_diferencias(_eventos_persistidos, cambiados, [])
+        _confirmar_asistencia(asistencias, asistencias_borradas)
+        _registrar_flush("events", len(cambiados) + len(asistencias) + len(asistencias_borradas), inicio)
+
+async def asistentes_evento(nombre_evento, timestamp_evento):
+    """Usuarios presentes en la corrida de `nombre_evento` de `timestamp_evento`,
+    incluidas las llegadas tarde."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text(
+                "SELECT user_name FROM event_attendance WHERE event_name = :evento "
+                "AND event_timestamp = :ts AND status IN (:asistio, :tarde) ORDER BY user_name"
+            ),
+            {"evento": nombre_evento, "ts": timestamp_evento.isoformat(), "asistio": ASISTIO, "tarde": TARDE}
+        )
+        return [row[0] for row in result]
+
+async def tasa_asistencia(nombre_usuario):
+    """(corridas con presencia, corridas convocadas) de `nombre_usuario`: cada vez
+    que se cargó un evento cuenta aparte, aunque el nombre se repita."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text(
+                "SELECT COALESCE(SUM(CASE WHEN status IN (:asistio, :tarde) THEN 1 ELSE 0 END), 0), COUNT(*) "
+                "FROM event_attendance WHERE user_name = :nombre"
+            ),
+            {"nombre": nombre_usuario, "asistio": ASISTIO, "tarde": TARDE}
+        )
+        presentes, total = result.one()
+        return presentes, total
+
+async def cargar_eventos_registrados():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT * FROM registered_events"))
+        rows = result.fetchall()
+        registered_events.clear()
+        registered_events.update(dict(row._mapping)["name"] for row in rows)
+
+async def cargar_aliases():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT patron, nombre FROM aliases ORDER BY id"))
+        aliases.clear()
+        aliases.update((patron, nombre) for patron, nombre in result)
+    automata_alias.construir(aliases)
+
+async def guardar_alias(patron, nombre):
+    """Crea o redirige el alias `patron` (se guarda en minúsculas) y recompila el autómata."""
+    patron = patron.lower()
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            _sql_upsert("aliases", ["patron", "nombre"], claves=("patron",)),
+            {"patron": patron, "nombre": nombre}
+        )
+        await _marcar_cambio(session)
+        await session.commit()
+    aliases[patron] = nombre
+    automata_alias.construir(aliases)
+
+async def borrar_alias(patron):
+    """Borra el alias `patron`. Devuelve False si no existía."""
+    patron = patron.lower()
+    if patron not in aliases:
+        return False
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM aliases WHERE patron = :patron"), {"patron": patron})
+        await _marcar_cambio(session)
+        await session.commit()
+    del aliases[patron]
+    automata_alias.construir(aliases)
+    return True
+
+def resolver_alias(linea):
+    """El nombre del alias que aparece en la línea de OCR, o la línea sin cambios."""
+    return automata_alias.buscar(linea) or linea
+
+async def guardar_eventos_registrados():
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM registered_events"))
+        if registered_events:
+            await session.execute(
+                text("INSERT INTO registered_events (name) VALUES (:name)"),
+                [{"name": name} for name in registered_events]
+            )
+        await _marcar_cambio(session)
+        await session.commit()
+
+async def cargar_historial_dkp():
+    """Carga en memoria solo la ventana reciente del historial."""
+    desde = score_history.inicio_ventana()
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("SELECT user_name, timestamp, delta, razon FROM score_history WHERE timestamp >= :desde ORDER BY timestamp, id"),
+            {"desde": desde.isoformat()}
+        )
+        score_history.clear()
+        score_history.desde = desde
+        # Las filas de un mismo evento comparten marca de tiempo: se reutiliza
+        # un único datetime por valor distinto.
+        fechas = {}
+        for user, timestamp, delta, razon in result:
+            fecha = fechas.get(timestamp)
+            if fecha is None:
+                fecha = fechas[timestamp] = _fecha(timestamp)
+            score_history.agregar(user, HistoryEntry(fecha, delta, razon))
+
+async def cargar_partys():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT * FROM partys"))
+        rows = result.fetchall()
+        PARTYS.clear()
+        _partys_persistidas.clear()
+        for row in rows:
+            party = dict(row._mapping)
+            if party.get("members") is not None:
+                PARTYS[party["name"]] = json.loads(party["members"])
+            else:
+                PARTYS[party["name"]] = []
+            _partys_persistidas[party["name"]] = _params_party(party["name"], PARTYS[party["name"]])
+
+async def save_partys():
+    actuales = {name: _params_party(name, members) for name, members in PARTYS.items()}
+    await _guardar_tabla("partys", COLUMNAS_PARTYS, actuales, _partys_persistidas)
+
+async def _insertar_historial(session, entradas):
+    sentencia = text("INSERT INTO score_history (user_name, timestamp, delta, razon) VALUES (:user_name, :timestamp, :delta, :razon)")
+    for i in range(0, len(entradas), TAMANO_LOTE):
+        await session.execute(sentencia, entradas[i:i + TAMANO_LOTE])
+
+def _agregar_historial_en_memoria(entradas, timestamp):
+    for entry in entradas:
+        score_history.agregar(entry["user_name"], HistoryEntry(timestamp, entry["delta"], entry["razon"]))
+
+def lock_usuario(nombre_usuario):
+    lock = _locks_usuario.get(nombre_usuario)
+    if lock is None:
+        lock = _locks_usuario[nombre_usuario] = asyncio.Lock()
+    return lock
+
+@asynccontextmanager
+async def bloquear_usuarios(nombres):
+    """Toma los locks de varios usuarios, siempre en el mismo orden para no trabarse."""
+    locks = [lock_usuario(nombre) for nombre in sorted(set(nombres))]
+    tomados = []
+    try:
+        for lock in locks:
+            await lock.acquire()
+            tomados.append(lock)
+        yield
+    finally:
+        for lock in reversed(tomados):
+            lock.release()
+
+async def _sumar_scores(session, deltas):
+    """Incrementa en la base el score de cada usuario de `deltas` (nombre -> delta)."""
+    result = await session.execute(
+        text("UPDATE users SET score = score + :delta WHERE name = :name"),
+        [{"name": nombre, "delta": delta} for nombre, delta in deltas.items()]
+    )
+    return result.rowcount
+
+def _publicar_deltas(deltas):
+    """Pasa a memoria los deltas ya confirmados en la base."""
+    for nombre, delta in deltas.items():
+        record = user_data.get(nombre)
+        if record is None:
+            continue
+        record.score += delta
+        persistido = _usuarios_persistidos.get(nombre)
+        if persistido is not None:
+            persistido["score"] = record.score
+    marcar_modificado()
+
+def _sumar_por_usuario(cambios):
+    deltas = {}
+    for nombre, delta, _ in cambios:
+        deltas[nombre] = deltas.get(nombre, 0) + delta
+    return deltas
+
+async def apply_delta(nombre_usuario, delta, razon="", minimo=None, bloqueado=False):
+    """Suma `delta` al score de `nombre_usuario`: la fila de users, el historial y la
+    memoria cambian juntos o no cambian. Con `minimo`, rechaza el cambio si el score
+    quedaría por debajo. Devuelve el score nuevo, o None si se rechazó.
+
+    `bloqueado=True` indica que quien llama ya tiene `lock_usuario(nombre_usuario)`."""
+    if not bloqueado:
+        async with lock_usuario(nombre_usuario):
+            return await apply_delta(nombre_usuario, delta, razon, minimo, bloqueado=True)
+
+    record = user_data.get(nombre_usuario)
+    if record is None or (minimo is not None and record.score + delta < minimo):
+        return None
+
+    timestamp = datetime.utcnow()
+    entry = {
+        "timestamp": timestamp.isoformat(),
+        "delta": delta,
+        "razon": razon,
+        "user_name": nombre_usuario
+    }
+    deltas = {nombre_usuario: delta}
+    sumadas = 0
+    # La fila de un usuario recreado sin guardar es la del registro anterior.
+    if _registros_persistidos.get(nombre_usuario) is record:
+        async with AsyncSessionLocal() as session:
+            sumadas = await _sumar_scores(session, deltas)
+            if sumadas:
+                await _insertar_historial(session, [entry])
+                await _marcar_cambio(session)
+                await session.commit()
+
+    if not sumadas:
+        # La fila todavía no está en la base (usuario nuevo, recreado o renombrado sin
+        # guardar): se escribe con los demás usuarios pendientes y se incrementa en la
+        # misma transacción.
+        async with _lock_guardado:
+            cambiadas, borradas, registros = _diferencias_usuarios()
+            async with AsyncSessionLocal() as session:
+                await _escribir_diferencias(session, "users", COLUMNAS_USERS, cambiadas, borradas)
+                await _sumar_scores(session, deltas)
+                await _insertar_historial(session, [entry])
+                await _marcar_cambio(session)
+                await session.commit()
+            _confirmar_usuarios(cambiadas, borradas, registros)
+
+    _publicar_deltas(deltas)
+    _agregar_historial_en_memoria([entry], timestamp)
+    return record.score
+
+async def aplicar_eventos(planes):
+    """Aplica los `planes` en una sola transacción: historial, incrementos de score,
+    eventos, asistencia y justificaciones consumidas. La memoria se actualiza recién
+    después del commit, así que si algo falla no cambia nada. Quien llama debe tener
+    los locks de los usuarios afectados (ver bloquear_usuarios).
+
+    Una cancelación no interrumpe la aplicación ya empezada: se termina y se publica."""
+    await asyncio.shield(_aplicar_eventos(planes))
+
+async def _aplicar_eventos(planes):
+    entradas = [
+        [
+            {"timestamp": plan.evento.timestamp.isoformat(), "delta": delta, "razon": razon, "user_name": nombre}
+            for nombre, delta, razon in plan.cambios
+        ]
+        for plan in planes
+    ]
+    deltas = _sumar_por_usuario([cambio for plan in planes for cambio in plan.cambios])
+    # Si un lote repite el nombre de un evento, en events queda el último (igual que
+    # en events_info); la asistencia se guarda para cada corrida.
+    ultimos = {plan.nombre: plan for plan in planes}
+    eventos = [_params_evento(plan.nombre, plan.evento) for plan in ultimos.values()]
+    asistencias = [
+        [
+            _params_asistencia(plan.nombre, plan.evento.timestamp, nombre, estado, delta)
+            for nombre, (estado, delta) in plan.evento.asistencia.items()
+        ]
+        for plan in planes
+    ]
+    consumidas_por_corrida = [
+        {"si": True, "event_name": plan.nombre, "event_timestamp": plan.evento.timestamp.isoformat(), "user_name": nombre}
+        for plan in planes
+        for nombre in plan.justificaciones
+    ]
+    consumidas = {(nombre, plan.nombre) for plan in planes for nombre in plan.justificaciones}
+    nombres_eventos = set(ultimos)
+
+    async with _lock_guardado:
+        inicio = time.perf_counter()
+        # Los usuarios que todavía no están en la base se escriben primero para que
+        # los incrementos de score los alcancen.
+        usuarios, usuarios_borrados, registros = _diferencias_usuarios()
+        async with AsyncSessionLocal() as session:
+            await _escribir_diferencias(session, "users", COLUMNAS_USERS, usuarios, usuarios_borrados)
+            if deltas:
+                await _sumar_scores(session, deltas)
+            for lote in entradas:
+                if lote:
+                    await _insertar_historial(session, lote)
+            await _escribir_diferencias(session, "events", COLUMNAS_EVENTS, eventos, [])
+            await _escribir_asistencia(session, [params for asistencia in asistencias for params in asistencia], [])
+            if consumidas_por_corrida:
+                # Se guarda qué justificaciones se gastaron para poder devolverlas al revertir.
+                await session.execute(
+                    text(
+                        "UPDATE event_attendance SET justificacion_consumida = :si WHERE event_name = :event_name "
+                        "AND event_timestamp = :event_timestamp AND user_name = :user_name"
+                    ),
+                    consumidas_por_corrida
+                )
+            await _escribir_justificaciones(session, [], consumidas)
+            await _marcar_cambio(session)
+            await session.commit()
+
+        _confirmar_usuarios(usuarios, usuarios_borrados, registros)
+        _confirmar_diferencias(_eventos_persistidos, eventos, [])
+        for plan in planes:
+            events_info[plan.nombre] = plan.evento
+            for nombre in plan.justificaciones:
+                if nombre in user_data:
+                    user_data[nombre].justified_events.discard(plan.nombre)
+        _confirmar_justificaciones([], consumidas)
+        # En memoria queda solo la corrida vigente de cada evento.
+        for clave in [clave for clave in _asistencias_persistidas if clave[0] in nombres_eventos]:
+            del _asistencias_persistidas[clave]
+        for plan, asistencia in zip(planes, asistencias):
+            if ultimos[plan.nombre] is plan:
+                _confirmar_asistencia(asistencia, [])
+        _publicar_deltas(deltas)
+        for plan, lote in zip(planes, entradas):
+            _agregar_historial_en_memoria(lote, plan.evento.timestamp)
+        filas = sum(len(lote) for lote in entradas) + len(usuarios) + len(usuarios_borrados)
+        filas += len(deltas) + len(eventos) + sum(map(len, asistencias)) + len(consumidas_por_corrida)
+        _registrar_flush("score_history", filas, inicio)
+
+async def evento_persistido(nombre_evento):
+    """(timestamp, revertido) del evento en la base, o None si no existe."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("SELECT timestamp, revertido FROM events WHERE name = :name"),
+            {"name": nombre_evento}
+        )
+        row = result.first()
+    if row is None:
+        return None
+    return _fecha(row[0]), bool(row[1])
+
+def _es_asiento_del_evento(nombre_evento, timestamp_evento, timestamp, razon):
+    if razon.startswith(f"Evento {nombre_evento}:"):
+        return timestamp == timestamp_evento
+    return razon.startswith("Llegué tarde") and razon.endswith(f"- {nombre_evento}")
+
+async def _asientos_evento(session, nombre_evento, timestamp_evento):
+    """Deltas por usuario que dejó el evento en el historial: su puntuación y las
+    llegadas tarde. Usa el índice por timestamp, así que lee solo las filas del evento."""
+    # !llegue se acepta hasta VIGENCIA_EVENTO después del evento; se deja margen.
+    result = await session.execute(
+        text("SELECT user_name, timestamp, delta, razon FROM score_history WHERE timestamp >= :desde AND timestamp <= :hasta"),
+        {"desde": timestamp_evento.isoformat(), "hasta": (timestamp_evento + 2 * VIGENCIA_EVENTO).isoformat()}
+    )
+    deltas = {}
+    for nombre, timestamp, delta, razon in result:
+        if _es_asiento_del_evento(nombre_evento, timestamp_evento, _fecha(timestamp), razon or ""):
+            deltas[nombre] = deltas.get(nombre, 0) + delta
+    return deltas
+
+async def revertir_evento(nombre_evento):
+    """Deshace el evento aplicando en una transacción el inverso de sus asientos del
+    historial, devuelve las justificaciones que consumió y lo marca como revertido.
+    Devuelve (nombre -> delta aplicado, usuarios con justificación devuelta), o None
+    si el evento no existe o ya fue revertido."""
+    return await asyncio.shield(_revertir_evento(nombre_evento))
+
+async def _revertir_evento(nombre_evento):
+    estado = await evento_persistido(nombre_evento)
+    if estado is None or estado[1]:
+        return None
+    timestamp_evento = estado[0]
+
+    async with AsyncSessionLocal() as session:
+        bloquear = set(await _asientos_evento(session, nombre_evento, timestamp_evento))
+    while True:
+        async with bloquear_usuarios(bloquear), _lock_guardado:
+            inicio = time.perf_counter()
+            async with AsyncSessionLocal() as session:
+                marcado = await session.execute(
+                    text("UPDATE events SET revertido = :si WHERE name = :name AND timestamp = :ts AND revertido = :no"),
+                    {"si": True, "no": False, "name": nombre_evento, "ts": timestamp_evento.isoformat()}
+                )
+                if not marcado.rowcount:
+                    return None
+                asientos = await _asientos_evento(session, nombre_evento, timestamp_evento)
+                if not asientos.keys() <= bloquear:
+                    # Una llegada tarde se registró mientras se tomaban los locks.
+                    await session.rollback()
+                    bloquear |= asientos.keys()
+                    continue
+
+                inversos = {nombre: -delta for nombre, delta in asientos.items() if delta and nombre in user_data}
+                corrida = {"name": nombre_evento, "ts": timestamp_evento.isoformat()}
+                result = await session.execute(
+                    text(
+                        "SELECT user_name FROM event_attendance WHERE event_name = :name "
+                        "AND event_timestamp = :ts AND justificacion_consumida = :si"
+                    ),
+                    {**corrida, "si": True}
+                )
+                restauradas = [
+                    (nombre, nombre_evento) for (nombre,) in result
+                    if nombre in user_data and nombre_evento not in user_data[nombre].justified_events
+                ]
+
+                timestamp = datetime.utcnow()
+                entradas = [
+                    {"timestamp": timestamp.isoformat(), "delta": delta, "razon": f"Reversión del evento {nombre_evento}", "user_name": nombre}
+                    for nombre, delta in inversos.items()
+                ]
+                if inversos:
+                    await _sumar_scores(session, inversos)
+                    await _insertar_historial(session, entradas)
+                await _escribir_justificaciones(session, restauradas, [])
+                await session.execute(
+                    text("DELETE FROM event_attendance WHERE event_name = :name AND event_timestamp = :ts"),
+                    corrida
+                )
+                await _marcar_cambio(session)
+                await session.commit()
+
+            if nombre_evento in events_info and events_info[nombre_evento].timestamp == timestamp_evento:
+                del events_info[nombre_evento]
+                _eventos_persistidos.pop(nombre_evento, None)
+            for clave, params in list(_asistencias_persistidas.items()):
+                if clave[0] == nombre_evento and params["event_timestamp"] == corrida["ts"]:
+                    del _asistencias_persistidas[clave]
+            for nombre, evento in restauradas:
+                user_data[nombre].justified_events.add(evento)
+            _confirmar_justificaciones(restauradas, [])
+            _publicar_deltas(inversos)
+            _agregar_historial_en_memoria(entradas, timestamp)
+            _registrar_flush("score_history", len(entradas) + len(restauradas) + 1, inicio)
+            logger.info(f"Evento '{nombre_evento}' revertido: {len(inversos)} usuario(s), {len(restauradas)} justificación(es) devuelta(s).")
+            return inversos, [nombre for nombre, _ in restauradas]
@@ -1,152 +1,372 @@
-import os
-import logging
-import discord
-from datetime import datetime, timedelta
-
-import data_manager
-from data_manager import user_data, events_info, registrar_cambio_dkp, guardar_datos, guardar_eventos
-
-logger = logging.getLogger("event_logic")
-
-CANAL_ADMIN = int(os.getenv("CANAL_ADMIN", 0))
-CANAL_TARDE = int(os.getenv("CANAL_TARDE", 0))
-
-
-async def handle_evento(
-    nombre_evento: str,
-    puntaje: int,
-    noresta: bool,
-    listadenombres: list,
-    channel: discord.TextChannel,
-    executor: discord.User
-):
-    if puntaje <= 0:
-        embed = discord.Embed(
-            title="DKP Inválido",
-            description="El DKP debe ser un número positivo.",
-            color=discord.Color.red()
-        )
-        await channel.send(embed=embed)
-        logger.warning(f"'{executor}' intentó crear un evento con puntaje <= 0: {puntaje}")
-        return
-    
-    if CANAL_ADMIN is None:
-        await channel.send("No se pudo encontrar el canal de administración.")
-        logger.error(f"No se pudo encontrar el canal con ID {CANAL_ADMIN}.")
-        return
-
-    user_data_lower = {ud.lower(): ud for ud in user_data.keys()}
-    usuarios_final = set()
-    no_encontrados = []
-
-    for user_name in listadenombres:
-        nombre_real = user_data_lower.get(user_name.lower())
-        if nombre_real:
-            usuarios_final.add(nombre_real)
-        else:
-            no_encontrados.append(user_name)
-
-    event_time = datetime.utcnow()
-    events_info[nombre_evento] = {
-        "timestamp": event_time,
-        "linked_users": list(usuarios_final),
-        "late_users": set(),
-        "puntaje": puntaje,
-        "penalties": {}
-    }
-    logger.info(f"Evento '{nombre_evento}' registrado o actualizado por '{executor}'.")
-
-    old_scores = {nombre: datos["score"] for nombre, datos in user_data.items()}
-    estados_usuario = {}
-
-    if noresta:
-        for nombre, datos in user_data.items():
-            if datos.get("status", "normal") == "vacaciones":
-                estados_usuario[nombre] = "VACACIONES"
-                continue
-
-            if nombre in usuarios_final:
-                datos["score"] += puntaje
-                await registrar_cambio_dkp(nombre, +puntaje, f"Evento {nombre_evento}: ASISTIÓ (noresta)")
-
-                if nombre_evento in datos.get("justified_events", []):
-                    datos["justified_events"].remove(nombre_evento)
-
-                estados_usuario[nombre] = "ASISTIÓ"
-            else:
-                estados_usuario[nombre] = "NO ASISTIÓ"
-    else:
-        for nombre, datos in user_data.items():
-            if datos.get("status", "normal") == "vacaciones":
-                estados_usuario[nombre] = "VACACIONES"
-                continue
-
-            absence_until = datos.get("absence_until")
-            justificado_by_absence = (absence_until and event_time <= absence_until)
-            justificado_by_event = (nombre_evento in datos.get("justified_events", []))
-            justificado_evento = justificado_by_absence or justificado_by_event
-
-            if nombre in usuarios_final:
-                datos["score"] += puntaje
-                await registrar_cambio_dkp(nombre, +puntaje, f"Evento {nombre_evento}: ASISTIÓ")
-
-                if justificado_by_event:
-                    datos["justified_events"].remove(nombre_evento)
-
-                estados_usuario[nombre] = "ASISTIÓ"
-            else:
-                if justificado_evento:
-                    datos["score"] -= puntaje
-                    await registrar_cambio_dkp(nombre, -puntaje, f"Evento {nombre_evento}: JUSTIFICADO")
-
-                    if justificado_by_event:
-                        datos["justified_events"].remove(nombre_evento)
-
-                    estados_usuario[nombre] = "JUSTIFICADO"
-                else:
-                    penalizacion = puntaje * 2
-                    datos["score"] -= penalizacion
-                    await registrar_cambio_dkp(nombre, -penalizacion, f"Evento {nombre_evento}: NO ASISTIÓ")
-
-                    events_info[nombre_evento]["penalties"][nombre] = penalizacion
-                    estados_usuario[nombre] = "NO ASISTIÓ"
-
-    await guardar_datos()
-    await guardar_eventos()
-
-    all_users = sorted(user_data.items(), key=lambda x: x[0].lower())
-    desc = "```\n"
-    desc += "{:<15} {:<15} {:<10} {:<10}\n".format("Nombre", "Estado", "Antes", "Después")
-    desc += "-" * 55 + "\n"
-    for nombre, datos in all_users:
-        antes = old_scores.get(nombre, 0)
-        despues = datos["score"]
-        estado = estados_usuario.get(nombre, "ACTIVO")
-        desc += "{:<15} {:<15} {:<10} {:<10}\n".format(nombre, estado, str(antes), str(despues))
-    desc += "```"
-
-    embed = discord.Embed(
-        title=f"Evento: {nombre_evento}",
-        color=discord.Color.blurple(),
-        description=desc
-    )
-    await channel.send(embed=embed)
-
-    not_attended = []
-    for nombre, datos in user_data.items():
-        estado = estados_usuario.get(nombre, "ACTIVO")
-        if estado == "NO ASISTIÓ" and "discord_id" in datos:
-            not_attended.append(f"<@{datos['discord_id']}>")
-    
-    if not_attended:
-        tag_message = "Los siguientes usuarios no asistieron: " + ", ".join(not_attended)
-        await channel.send(tag_message)
-
-    if no_encontrados:
-        mensaje_no_encontrados = "No se encontraron los siguientes usuarios:\n" + ", ".join(no_encontrados)
-        await channel.send(embed=discord.Embed(
-            title="Usuarios no encontrados",
-            description=mensaje_no_encontrados,
-            color=discord.Color.red()
-        ))
-        logger.warning(f"Usuarios no encontrados al procesar '{nombre_evento}': {no_encontrados}.")
\ No newline at end of file
+import os
+import io
+import re
+import csv
+import json
+import logging
+import discord
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import data_manager
+import scoring
+from utils import MAX_EMBED_DESCRIPTION, split_into_chunks
+from data_manager import (
+    user_data,
+    aplicar_eventos,
+    bloquear_usuarios,
+    EventRecord,
+    PlanEvento,
+    ZONA_HORARIA
+)
+
+logger = logging.getLogger("event_logic")
+
+CANAL_ADMIN = int(os.getenv("CANAL_ADMIN", 0))
+CANAL_TARDE = int(os.getenv("CANAL_TARDE", 0))
+
+
+def calcular_evento(nombre_evento, puntaje, noresta, usuarios_final, event_time, ya_consumidas=()):
+    """Puntúa el evento sin modificar ningún estado y devuelve el PlanEvento a aplicar.
+
+    `ya_consumidas` son usuarios cuya justificación de este evento ya usó un plan
+    anterior todavía sin aplicar."""
+    filas = scoring.puntuar(user_data, nombre_evento, usuarios_final, puntaje, noresta, event_time, ya_consumidas)
+
+    sufijo = " (noresta)" if noresta else ""
+    razones = {
+        codigo: f"Evento {nombre_evento}: {estado}{sufijo if codigo == scoring.ASISTIO else ''}"
+        for codigo, estado in enumerate(scoring.NOMBRES_ESTADO)
+    }
+    plan = PlanEvento(nombre_evento, EventRecord(timestamp=event_time, puntaje=puntaje))
+    for nombre, codigo, delta, consume in filas:
+        estado = scoring.NOMBRES_ESTADO[codigo]
+        plan.estados[nombre] = estado
+        if codigo == scoring.VACACIONES:
+            continue
+        plan.evento.asistencia[nombre] = (estado, delta)
+        if delta:
+            plan.cambios.append((nombre, delta, razones[codigo]))
+        if consume:
+            plan.justificaciones.append(nombre)
+    return plan
+
+
+def _resolver_nombres(listadenombres):
+    """Separa los nombres dados en usuarios conocidos y no encontrados. Solo se
+    aceptan coincidencias exactas (sin distinguir mayúsculas) o por alias: un
+    parecido no alcanza para mover DKP. Para los no encontrados que se parecen a
+    un usuario se devuelven sugerencias (dado, nombre, confianza) para mostrarlas."""
+    usuarios_final = set()
+    no_encontrados = []
+    sugerencias = []
+    for user_name in listadenombres:
+        nombre_real = user_data.buscar_nombre(data_manager.aliases.get(user_name.lower(), user_name))
+        if nombre_real is not None:
+            usuarios_final.add(nombre_real)
+            continue
+        no_encontrados.append(user_name)
+        coincidencia = user_data.buscar_aproximado(user_name)
+        if coincidencia is not None:
+            sugerencias.append((user_name, *coincidencia))
+    return usuarios_final, no_encontrados, sugerencias
+
+
+def lineas_sugerencias(sugerencias):
+    return "\n".join(f"{dado} → ¿{nombre}? ({confianza:.0%})" for dado, nombre, confianza in sugerencias)
+
+
+def embed_sugerencias(sugerencias):
+    embed = discord.Embed(
+        title="¿Quisiste decir...?",
+        description=lineas_sugerencias(sugerencias)[:MAX_EMBED_DESCRIPTION],
+        color=discord.Color.gold()
+    )
+    embed.set_footer(text="No se aplicaron: corrige el nombre o agrega un alias con !agregaralias.")
+    return embed
+
+
+def vista_previa_evento(nombre_evento: str, puntaje: int, noresta: bool, listadenombres: list) -> list:
+    """Calcula la tabla de deltas del evento con las reglas de handle_evento sin
+    aplicarla: no modifica user_data ni escribe en la base. Devuelve los embeds."""
+    if puntaje <= 0:
+        return [discord.Embed(
+            title="DKP Inválido",
+            description="El DKP debe ser un número positivo.",
+            color=discord.Color.red()
+        )]
+
+    usuarios_final, no_encontrados, sugerencias = _resolver_nombres(listadenombres)
+    plan = calcular_evento(nombre_evento, puntaje, noresta, usuarios_final, datetime.utcnow())
+    deltas = {nombre: delta for nombre, delta, _ in plan.cambios}
+
+    lines = ["{:<15} {:<12} {:>6} {:>6} {:>7}".format("Nombre", "Estado", "Antes", "Delta", "Después"), "-" * 50]
+    for nombre in sorted(plan.estados, key=str.lower):
+        antes = user_data[nombre].score
+        delta = deltas.get(nombre, 0)
+        lines.append("{:<15} {:<12} {:>6} {:>+6} {:>7}".format(nombre, plan.estados[nombre], antes, delta, antes + delta))
+
+    chunks = split_into_chunks("\n".join(lines))
+    embeds = [
+        discord.Embed(
+            title=f"Vista Previa: {nombre_evento}" + (f" ({i}/{len(chunks)})" if len(chunks) > 1 else ""),
+            description=f"```\n{chunk}\n```",
+            color=discord.Color.light_grey()
+        )
+        for i, chunk in enumerate(chunks, start=1)
+    ]
+    estados = list(plan.estados.values())
+    embeds[-1].set_footer(
+        text=f"{estados.count('ASISTIÓ')} asistieron, {estados.count('JUSTIFICADO')} justificados, "
+             f"{estados.count('NO ASISTIÓ')} no asistieron. Vista previa: no se aplicó ningún cambio."
+    )
+    if sugerencias:
+        embeds.append(embed_sugerencias(sugerencias))
+    if no_encontrados:
+        embeds.append(discord.Embed(
+            title="Usuarios no encontrados",
+            description=", ".join(no_encontrados)[:MAX_EMBED_DESCRIPTION],
+            color=discord.Color.red()
+        ))
+    return embeds
+
+
+async def handle_evento(
+    nombre_evento: str,
+    puntaje: int,
+    noresta: bool,
+    listadenombres: list,
+    channel: discord.TextChannel,
+    executor: discord.User
+):
+    if puntaje <= 0:
+        embed = discord.Embed(
+            title="DKP Inválido",
+            description="El DKP debe ser un número positivo.",
+            color=discord.Color.red()
+        )
+        await channel.send(embed=embed)
+        logger.warning(f"'{executor}' intentó crear un evento con puntaje <= 0: {puntaje}")
+        return
+    
+    if CANAL_ADMIN is None:
+        await channel.send("No se pudo encontrar el canal de administración.")
+        logger.error(f"No se pudo encontrar el canal con ID {CANAL_ADMIN}.")
+        return
+
+    usuarios_final, no_encontrados, sugerencias = _resolver_nombres(listadenombres)
+
+    event_time = datetime.utcnow()
+
+    # Los locks de todos los usuarios impiden que un !sumardkp o !llegue concurrente
+    # cambie un score entre la lectura y la aplicación del evento.
+    async with bloquear_usuarios(user_data):
+        old_scores = {nombre: datos.score for nombre, datos in user_data.items()}
+        plan = calcular_evento(nombre_evento, puntaje, noresta, usuarios_final, event_time)
+        try:
+            await aplicar_eventos([plan])
+        except Exception:
+            logger.exception(f"No se pudo aplicar el evento '{nombre_evento}'; no se hicieron cambios.")
+            await channel.send(embed=discord.Embed(
+                title="Error al Registrar Evento",
+                description=f"No se pudo guardar el evento **{nombre_evento}**. No se aplicó ningún cambio; intenta de nuevo.",
+                color=discord.Color.red()
+            ))
+            return
+    logger.info(f"Evento '{nombre_evento}' registrado o actualizado por '{executor}'.")
+    estados_usuario = plan.estados
+
+    all_users = sorted(user_data.items(), key=lambda x: x[0].lower())
+    desc = "```\n"
+    desc += "{:<15} {:<15} {:<10} {:<10}\n".format("Nombre", "Estado", "Antes", "Después")
+    desc += "-" * 55 + "\n"
+    for nombre, datos in all_users:
+        antes = old_scores.get(nombre, 0)
+        despues = datos.score
+        estado = estados_usuario.get(nombre, "ACTIVO")
+        desc += "{:<15} {:<15} {:<10} {:<10}\n".format(nombre, estado, str(antes), str(despues))
+    desc += "```"
+
+    embed = discord.Embed(
+        title=f"Evento: {nombre_evento}",
+        color=discord.Color.blurple(),
+        description=desc
+    )
+    await channel.send(embed=embed)
+
+    not_attended = []
+    for nombre, datos in user_data.items():
+        estado = estados_usuario.get(nombre, "ACTIVO")
+        if estado == "NO ASISTIÓ" and datos.discord_id is not None:
+            not_attended.append(f"<@{datos.discord_id}>")
+    
+    if not_attended:
+        tag_message = "Los siguientes usuarios no asistieron: " + ", ".join(not_attended)
+        await channel.send(tag_message)
+
+    if sugerencias:
+        await channel.send(embed=embed_sugerencias(sugerencias))
+
+    if no_encontrados:
+        mensaje_no_encontrados = "No se encontraron los siguientes usuarios:\n" + ", ".join(no_encontrados)
+        await channel.send(embed=discord.Embed(
+            title="Usuarios no encontrados",
+            description=mensaje_no_encontrados,
+            color=discord.Color.red()
+        ))
+        logger.warning(f"Usuarios no encontrados al procesar '{nombre_evento}': {no_encontrados}.")
+
+
+# Nombres de columna aceptados en los archivos de !importareventos.
+CAMPOS_IMPORTACION = {
+    "nombre": ("nombre", "evento", "name", "event"),
+    "puntaje": ("puntaje", "puntos", "dkp", "points"),
+    "noresta": ("noresta",),
+    "asistentes": ("asistentes", "usuarios", "attendees"),
+    "timestamp": ("timestamp", "fecha", "hora")
+}
+VALORES_VERDADEROS = {"1", "true", "si", "sí", "yes", "x", "noresta"}
+
+
+def _campo(fila, campo):
+    for alias in CAMPOS_IMPORTACION[campo]:
+        if alias in fila and fila[alias] not in (None, ""):
+            return fila[alias]
+    return None
+
+
+def leer_eventos_importados(nombre_archivo: str, contenido: bytes) -> list:
+    """Lee los eventos de un CSV o JSON. Lanza ValueError con la fila que falla."""
+    texto = contenido.decode("utf-8-sig")
+    if nombre_archivo.lower().endswith(".json"):
+        filas = json.loads(texto)
+        if isinstance(filas, dict):
+            filas = filas.get("eventos", [])
+        if not isinstance(filas, list):
+            raise ValueError("El JSON debe ser una lista de eventos o un objeto con la clave \"eventos\".")
+    else:
+        try:
+            filas = list(csv.DictReader(io.StringIO(texto)))
+        except csv.Error as e:
+            raise ValueError(f"CSV inválido: {e}")
+
+    eventos = []
+    for numero, fila in enumerate(filas, start=1):
+        if not isinstance(fila, dict):
+            raise ValueError(f"Fila {numero}: cada evento debe ser un objeto con sus campos.")
+        fila = {str(k).strip().lower(): v for k, v in fila.items()}
+        nombre = _campo(fila, "nombre")
+        if not nombre:
+            raise ValueError(f"Fila {numero}: falta el nombre del evento.")
+        if not isinstance(nombre, (str, int)) or isinstance(nombre, bool):
+            raise ValueError(f"Fila {numero}: el nombre del evento debe ser texto.")
+        puntaje = _campo(fila, "puntaje")
+        try:
+            if isinstance(puntaje, bool) or (isinstance(puntaje, float) and not puntaje.is_integer()):
+                raise ValueError
+            puntaje = int(puntaje)
+        except (TypeError, ValueError):
+            raise ValueError(f"Fila {numero} ({nombre}): el puntaje debe ser un número entero.")
+        if puntaje <= 0:
+            raise ValueError(f"Fila {numero} ({nombre}): el DKP debe ser un número positivo.")
+
+        noresta = _campo(fila, "noresta")
+        if not isinstance(noresta, bool):
+            noresta = str(noresta or "").strip().lower() in VALORES_VERDADEROS
+
+        asistentes = _campo(fila, "asistentes") or []
+        if isinstance(asistentes, str):
+            asistentes = [a for a in re.split(r"[;,\s]+", asistentes) if a]
+        if not isinstance(asistentes, list) or not all(
+            isinstance(a, (str, int)) and not isinstance(a, bool) for a in asistentes
+        ):
+            raise ValueError(f"Fila {numero} ({nombre}): los asistentes deben ser una lista de nombres o un texto separado por comas.")
+
+        timestamp = _campo(fila, "timestamp")
+        if timestamp:
+            if not isinstance(timestamp, str):
+                raise ValueError(f"Fila {numero} ({nombre}): la fecha debe ser texto ISO 8601.")
+            try:
+                timestamp = datetime.fromisoformat(timestamp)
+            except ValueError:
+                raise ValueError(f"Fila {numero} ({nombre}): fecha inválida '{timestamp}'.")
+            # Sin zona se toma la hora del servidor del juego; se guarda en UTC sin zona.
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=ZONA_HORARIA)
+            timestamp = timestamp.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
+
+        eventos.append({
+            "nombre": str(nombre).strip().upper(),
+            "puntaje": puntaje,
+            "noresta": noresta,
+            "asistentes": [str(a).strip() for a in asistentes],
+            "timestamp": timestamp
+        })
+    if not eventos:
+        raise ValueError("El archivo no tiene eventos.")
+    return eventos
+
+
+async def importar_eventos(eventos: list, channel: discord.TextChannel, executor: discord.User):
+    """Puntúa los eventos en orden con las mismas reglas que handle_evento y los
+    guarda todos juntos en una sola transacción al final."""
+    no_encontrados = set()
+    sugerencias = {}
+    ahora = datetime.utcnow()
+
+    async with bloquear_usuarios(user_data):
+        planes = []
+        consumidas = {}
+        for evento in eventos:
+            usuarios_final, faltantes, parecidos = _resolver_nombres(evento["asistentes"])
+            no_encontrados.update(faltantes)
+            sugerencias.update((dado, (dado, nombre, confianza)) for dado, nombre, confianza in parecidos)
+            plan = calcular_evento(
+                evento["nombre"], evento["puntaje"], evento["noresta"], usuarios_final,
+                evento["timestamp"] or ahora, consumidas.get(evento["nombre"], ())
+            )
+            consumidas.setdefault(evento["nombre"], set()).update(plan.justificaciones)
+            planes.append(plan)
+        try:
+            await aplicar_eventos(planes)
+        except Exception:
+            logger.exception(f"No se pudo importar {len(planes)} evento(s); no se hicieron cambios.")
+            await channel.send(embed=discord.Embed(
+                title="Error al Importar Eventos",
+                description="No se pudieron guardar los eventos. No se aplicó ningún cambio; intenta de nuevo.",
+                color=discord.Color.red()
+            ))
+            return
+    logger.info(f"'{executor}' importó {len(planes)} evento(s).")
+
+    lineas = []
+    total_dkp = 0
+    for evento, plan in zip(eventos, planes):
+        estados = list(plan.estados.values())
+        total_dkp += sum(delta for _, delta, _ in plan.cambios)
+        lineas.append(
+            f"**{plan.nombre}** ({plan.evento.puntaje} DKP{', noresta' if evento['noresta'] else ''}): "
+            f"{estados.count('ASISTIÓ')} asistieron, {estados.count('JUSTIFICADO')} justificados, "
+            f"{estados.count('NO ASISTIÓ')} no asistieron"
+        )
+    resumen = "\n".join(lineas)
+    resumen += f"\n\nUsuarios afectados: {len({n for p in planes for n, _, _ in p.cambios})} | DKP neto: {total_dkp:+}"
+    embed = discord.Embed(
+        title=f"Eventos Importados: {len(planes)}",
+        description=resumen[:MAX_EMBED_DESCRIPTION],
+        color=discord.Color.blurple()
+    )
+    if sugerencias:
+        embed.add_field(
+            name="¿Quisiste decir...? (no se aplicaron)",
+            value=lineas_sugerencias(sugerencias.values())[:1024],
+            inline=False
+        )
+    if no_encontrados:
+        embed.add_field(
+            name="Usuarios no encontrados",
+            value=", ".join(sorted(no_encontrados))[:1024],
+            inline=False
+        )
+        logger.warning(f"Usuarios no encontrados al importar eventos: {sorted(no_encontrados)}.")
+    await channel.send(embed=embed)
@@ -1,113 +1,289 @@
-import os
-import logging
-import discord
-from discord.ext import commands
-from dotenv import load_dotenv
-import asyncio
-from datetime import datetime
-from zoneinfo import ZoneInfo
-import ssl
-
-load_dotenv()
-
-import data_manager
-import tasks
-
-from aiohttp import web
-
-TOKEN = os.getenv("DISCORD_BOT_TOKEN")
-if not TOKEN:
-    raise ValueError("No se encontró DISCORD_BOT_TOKEN en el archivo .env")
-
-WEB_PORT = int(os.getenv("WEB_PORT", 5000))
-
-logging.basicConfig(
-    filename='bot_commands.log',
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s'
-)
-logger = logging.getLogger("main")
-
-intents = discord.Intents.default()
-intents.messages = True
-intents.message_content = True
-intents.guilds = True
-intents.members = True
-
-bot = commands.Bot(
-    command_prefix="!",
-    intents=intents,
-    help_command=None,
-    case_insensitive=True
-)
-
-def serialize_history(history):
-    serialized = []
-    for record in history:
-        new_record = record.copy()
-        ts = new_record.get("timestamp")
-        if isinstance(ts, datetime):
-            new_record["timestamp"] = ts.isoformat()
-        serialized.append(new_record)
-    return serialized
-
-async def handle_users(request):
-    users_list = []
-    for name, data in data_manager.user_data.items():
-        let_equipo = data.get("equipo", {})
-        history = data_manager.score_history.get(name, [])
-        serialized_history = serialize_history(history)
-        users_list.append({
-            "name": name,
-            "arma_principal": let_equipo.get("arma_principal", "N/A"),
-            "arma_secundaria": let_equipo.get("arma_secundaria", "N/A"),
-            "rol": let_equipo.get("rol", "N/A"),
-            "score": data.get("score", 0),
-            "history": serialized_history
-        })
-    response = web.json_response(users_list)
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    return response
-
-async def start_web_server():
-    app = web.Application()
-    app.router.add_get('/api/users', handle_users)
-    runner = web.AppRunner(app)
-    await runner.setup()
-    
-    constCert = os.getenv("SSL_CERT_PATH")
-    constKey = os.getenv("SSL_KEY_PATH")
-    ssl_context = None
-    if constCert and constKey:
-        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-        ssl_context.load_cert_chain(certfile=constCert, keyfile=constKey)
-    
-    site = web.TCPSite(runner, '0.0.0.0', WEB_PORT, ssl_context=ssl_context)
-    await site.start()
-    print(f"Servidor web iniciado en el puerto {WEB_PORT} con SSL: {ssl_context is not None}")
-
-@bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        await ctx.send("El comando no existe.")
-    else:
-        raise error
-
-@bot.event
-async def on_ready():
-    await data_manager.init_db()
-    await data_manager.cargar_todos_los_datos()
-    logger.info("Datos cargados correctamente.")
-
-    tasks.iniciar_tareas(bot)
-    logger.info("Tareas iniciadas.")
-
-    await bot.load_extension("dkp_commands")
-    logger.info("Extensión 'dkp_commands' cargada exitosamente.")
-
-    asyncio.create_task(start_web_server())
-    
-    print("Comandos registrados:", [cmd.name for cmd in bot.commands])
-    print(f"Bot conectado como {bot.user} (ID: {bot.user.id})")
-
-bot.run(TOKEN)
\ No newline at end of file
+import os
+import logging
+import discord
+from discord.ext import commands
+from dotenv import load_dotenv
+import asyncio
+import json
+import base64
+import bisect
+import hashlib
+import itertools
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import ssl
+
+load_dotenv()
+
+import data_manager
+import persistence_queue
+import ocr
+import cola_ocr
+import tasks
+
+from aiohttp import web
+
+TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+if not TOKEN:
+    raise ValueError("No se encontró DISCORD_BOT_TOKEN en el archivo .env")
+
+WEB_PORT = int(os.getenv("WEB_PORT", 5000))
+
+logging.basicConfig(
+    filename='bot_commands.log',
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+)
+logger = logging.getLogger("main")
+
+intents = discord.Intents.default()
+intents.messages = True
+intents.message_content = True
+intents.guilds = True
+intents.members = True
+
+class DKPBot(commands.Bot):
+    async def close(self):
+        if await persistence_queue.detener() and data_manager.datos_cargados:
+            await data_manager.guardar_snapshot()
+        await cola_ocr.detener()
+        await ocr.cerrar()
+        await super().close()
+
+bot = DKPBot(
+    command_prefix="!",
+    intents=intents,
+    help_command=None,
+    case_insensitive=True
+)
+
+def serialize_history(name, history):
+    return [
+        {
+            "timestamp": record.timestamp.isoformat(),
+            "delta": record.delta,
+            "razon": record.razon,
+            "user_name": name
+        }
+        for record in history
+    ]
+
+API_LIMITE_POR_DEFECTO = 100
+API_LIMITE_MAXIMO = 1000
+
+# Campos que se pueden pedir con ?fields=; "name" va siempre. El historial (los
+# últimos días en memoria) solo si se pide: es lo que más pesa.
+CAMPOS_USUARIO = {
+    "arma_principal": lambda name, data: data.equipo.get("arma_principal", "N/A"),
+    "arma_secundaria": lambda name, data: data.equipo.get("arma_secundaria", "N/A"),
+    "rol": lambda name, data: data.equipo.get("rol", "N/A"),
+    "gear_score": lambda name, data: data.equipo.get("gear_score"),
+    "score": lambda name, data: data.score,
+    "status": lambda name, data: data.status,
+    "history": lambda name, data: serialize_history(name, data_manager.score_history.recientes(name)),
+}
+CAMPOS_POR_DEFECTO = tuple(campo for campo in CAMPOS_USUARIO if campo != "history")
+
+# Respuestas de /api/users ya codificadas por consulta, válidas para la versión de
+# estado en que se armaron; un cambio en los datos las descarta todas.
+MAX_CONSULTAS_EN_CACHE = 64
+_respuestas_users = {"version": None, "nombres": [], "por_consulta": {}}
+
+def _error_api(status, mensaje):
+    response = web.json_response({"error": mensaje}, status=status)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+def _codificar_cursor(nombre):
+    return base64.urlsafe_b64encode(nombre.encode("utf-8")).decode("ascii")
+
+def _decodificar_cursor(cursor):
+    try:
+        # validate=True: sin él, los caracteres fuera del alfabeto se descartan en silencio.
+        nombre = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise ValueError("cursor inválido")
+    if not nombre:
+        raise ValueError("cursor inválido")
+    return nombre
+
+def _consulta_users(query):
+    """Parámetros de /api/users normalizados, como clave de la caché. Lanza
+    ValueError con el motivo si alguno es inválido. Sin limit ni cursor no se
+    pagina (límite None): la lista completa, como antes de existir las páginas."""
+    cursor = _decodificar_cursor(query["cursor"]) if "cursor" in query else None
+    if "limit" in query or cursor is not None:
+        limite = query.get("limit", str(API_LIMITE_POR_DEFECTO))
+        if not limite.isdigit() or not 1 <= int(limite) <= API_LIMITE_MAXIMO:
+            raise ValueError(f"limit debe ser un entero entre 1 y {API_LIMITE_MAXIMO}")
+        limite = int(limite)
+    else:
+        limite = None
+
+    if "fields" in query:
+        pedidos = {campo.strip() for campo in query["fields"].split(",") if campo.strip()} - {"name"}
+        desconocidos = pedidos - CAMPOS_USUARIO.keys()
+        if desconocidos:
+            raise ValueError(f"campos desconocidos: {', '.join(sorted(desconocidos))}")
+        campos = tuple(campo for campo in CAMPOS_USUARIO if campo in pedidos)
+    else:
+        campos = CAMPOS_POR_DEFECTO
+
+    filtros = tuple((filtro, query[filtro].lower()) for filtro in ("weapon", "role", "status") if query.get(filtro))
+    return limite, cursor, campos, filtros
+
+def _cumple_filtros(data, filtros):
+    for filtro, valor in filtros:
+        if filtro == "weapon":
+            armas = (data.equipo.get("arma_principal", ""), data.equipo.get("arma_secundaria", ""))
+            if valor not in (arma.lower() for arma in armas if arma):
+                return False
+        elif filtro == "role":
+            if (data.equipo.get("rol") or "").lower() != valor:
+                return False
+        elif (data.status or "").lower() != valor:
+            return False
+    return True
+
+def _cuerpo_users(consulta):
+    version = data_manager.version_estado
+    if _respuestas_users["version"] != version:
+        # Orden por nombre: el cursor es el último nombre devuelto.
+        _respuestas_users.update(version=version, nombres=sorted(data_manager.user_data), por_consulta={})
+    por_consulta = _respuestas_users["por_consulta"]
+    if consulta in por_consulta:
+        return por_consulta[consulta]
+
+    limite, cursor, campos, filtros = consulta
+    nombres = _respuestas_users["nombres"]
+    inicio = bisect.bisect_right(nombres, cursor) if cursor is not None else 0
+    users_list = []
+    siguiente = None
+    for name in itertools.islice(nombres, inicio, None):
+        data = data_manager.user_data[name]
+        if not _cumple_filtros(data, filtros):
+            continue
+        if len(users_list) == limite:
+            siguiente = _codificar_cursor(users_list[-1]["name"])
+            break
+        fila = {"name": name}
+        for campo in campos:
+            fila[campo] = CAMPOS_USUARIO[campo](name, data)
+        users_list.append(fila)
+
+    # Lista sola, como siempre; el cursor de la página siguiente va en X-Next-Cursor.
+    cuerpo = json.dumps(users_list).encode("utf-8")
+    # Del contenido y no del contador, que vuelve a empezar con cada reinicio.
+    etag = f'"{hashlib.blake2b(cuerpo, digest_size=16).hexdigest()}"'
+    if len(por_consulta) >= MAX_CONSULTAS_EN_CACHE:
+        por_consulta.pop(next(iter(por_consulta)))
+    por_consulta[consulta] = cuerpo, etag, siguiente
+    return cuerpo, etag, siguiente
+
+def _etag_coincide(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == etag for c in candidatos)
+
+async def handle_users(request):
+    try:
+        consulta = _consulta_users(request.query)
+    except ValueError as e:
+        return _error_api(400, str(e))
+    cuerpo, etag, siguiente = _cuerpo_users(consulta)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Expose-Headers": "ETag, X-Next-Cursor"
+    }
+    if siguiente is not None:
+        headers["X-Next-Cursor"] = siguiente
+    if _etag_coincide(request.headers.get("If-None-Match"), etag):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=cuerpo, content_type="application/json", headers=headers)
+
+def _fecha_api(valor):
+    """Fecha ISO 8601 de la query como UTC sin zona, igual que el historial; None si falta."""
+    if not valor:
+        return None
+    fecha = datetime.fromisoformat(valor)
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha
+
+async def handle_user_history(request):
+    nombre = data_manager.user_data.buscar_nombre(request.match_info["name"])
+    if nombre is None:
+        return _error_api(404, f"no existe el usuario {request.match_info['name']}")
+    try:
+        desde = _fecha_api(request.query.get("since"))
+        hasta = _fecha_api(request.query.get("until"))
+    except ValueError:
+        return _error_api(400, "since y until deben ser fechas ISO 8601")
+    # Dentro de la ventana en memoria no toca la base; fuera, usa el índice (user_name, timestamp).
+    history = await data_manager.score_history.consultar(nombre, desde, hasta)
+    response = web.json_response(serialize_history(nombre, history))
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+async def handle_metrics(request):
+    response = web.json_response({
+        "cola_persistencia": persistence_queue.metricas_actuales(),
+        "guardado": data_manager.estadisticas_guardado,
+        "ocr_cache": ocr.metricas_cache(),
+        "cola_ocr": cola_ocr.metricas_actuales()
+    })
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+async def start_web_server():
+    app = web.Application()
+    app.router.add_get('/api/users', handle_users)
+    app.router.add_get('/api/users/{name}/history', handle_user_history)
+    app.router.add_get('/api/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    
+    constCert = os.getenv("SSL_CERT_PATH")
+    constKey = os.getenv("SSL_KEY_PATH")
+    ssl_context = None
+    if constCert and constKey:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(certfile=constCert, keyfile=constKey)
+    
+    site = web.TCPSite(runner, '0.0.0.0', WEB_PORT, ssl_context=ssl_context)
+    await site.start()
+    print(f"Servidor web iniciado en el puerto {WEB_PORT} con SSL: {ssl_context is not None}")
+
+@bot.event
+async def on_command_error(ctx, error):
+    if isinstance(error, commands.CommandNotFound):
+        await ctx.send("El comando no existe.")
+    else:
+        raise error
+
+@bot.event
+async def on_ready():
+    await data_manager.init_db()
+    await data_manager.cargar_todos_los_datos()
+    logger.info("Datos cargados correctamente.")
+
+    persistence_queue.iniciar()
+
+    tasks.iniciar_tareas(bot)
+    logger.info("Tareas iniciadas.")
+
+    await bot.load_extension("dkp_commands")
+    logger.info("Extensión 'dkp_commands' cargada exitosamente.")
+
+    asyncio.create_task(start_web_server())
+    
+    print("Comandos registrados:", [cmd.name for cmd in bot.commands])
+    print(f"Bot conectado como {bot.user} (ID: {bot.user.id})")
+
+# El pool de procesos del OCR puede reimportar este módulo en sus procesos (spawn en
+# Windows): solo el proceso principal arranca el bot.
+if __name__ == "__main__":
+    bot.run(TOKEN)
\ No newline at end of file
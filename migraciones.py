@@ -0,0 +1,261 @@
+import json
+import time
+import logging
+from datetime import datetime
+from sqlalchemy import DateTime, MetaData, Table, Text, UniqueConstraint, inspect, text
+
+logger = logging.getLogger("migraciones")
+
+TAMANO_LOTE = 500
+
+# (versión, descripción, función). Cada migración corre en su propia transacción
+# junto con el registro de su versión, así que una que falla se reintenta entera
+# en el próximo arranque. Deben poder correr sobre una base recién creada.
+MIGRACIONES = []
+
+
+def migracion(version, descripcion):
+    def registrar(funcion):
+        MIGRACIONES.append((version, descripcion, funcion))
+        return funcion
+    return registrar
+
+
+async def aplicar_migraciones(engine):
+    """Aplica en orden las migraciones pendientes y devuelve [(versión, descripción, ms)]."""
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, descripcion VARCHAR(255), aplicada_en VARCHAR(32), duracion_ms REAL)"
+        ))
+        result = await conn.execute(text("SELECT version FROM schema_version"))
+        aplicadas = {row[0] for row in result}
+
+    reporte = []
+    for version, descripcion, funcion in sorted(MIGRACIONES, key=lambda m: m[0]):
+        if version in aplicadas:
+            continue
+        logger.info(f"Aplicando migración {version}: {descripcion}...")
+        inicio = time.perf_counter()
+        async with engine.begin() as conn:
+            await funcion(conn)
+            ms = (time.perf_counter() - inicio) * 1000
+            await conn.execute(
+                text("INSERT INTO schema_version (version, descripcion, aplicada_en, duracion_ms) VALUES (:v, :d, :a, :ms)"),
+                {"v": version, "d": descripcion, "a": datetime.utcnow().isoformat(), "ms": ms}
+            )
+        logger.info(f"Migración {version} aplicada en {ms:.1f} ms.")
+        reporte.append((version, descripcion, ms))
+
+    version_actual = max([v for v, _, _ in MIGRACIONES] + [0])
+    if reporte:
+        total = sum(ms for _, _, ms in reporte)
+        logger.info(f"Esquema en versión {version_actual}: {len(reporte)} migración(es) en {total:.1f} ms.")
+    else:
+        logger.info(f"Esquema en versión {version_actual}, sin migraciones pendientes.")
+    return reporte
+
+
+def _columnas(sync_conn, tabla):
+    return {c["name"]: c["type"] for c in inspect(sync_conn).get_columns(tabla)}
+
+
+async def cambiar_tipo_columna(conn, tabla, columna, tipo):
+    """Cambia el tipo de `tabla.columna` conservando los datos. PostgreSQL lo hace en
+    el lugar; SQLite no tiene ALTER COLUMN y se reconstruye la tabla."""
+    tipo_sql = tipo.compile(dialect=conn.dialect)
+    actual = (await conn.run_sync(_columnas, tabla))[columna]
+    if actual.compile(dialect=conn.dialect) == tipo_sql:
+        return False
+    if conn.dialect.name == "sqlite":
+        def ajustar(nueva):
+            nueva.c[columna].type = tipo
+        await conn.run_sync(_reconstruir_tabla_sqlite, tabla, ajustar)
+    else:
+        await conn.execute(text(
+            f"ALTER TABLE {tabla} ALTER COLUMN {columna} TYPE {tipo_sql} USING {columna}::{tipo_sql}"
+        ))
+    return True
+
+
+async def reemplazar_restriccion_unica(conn, tabla, vieja, nueva, columnas):
+    """Cambia la restricción única `vieja` de `tabla` por `nueva` sobre `columnas`.
+    SQLite no puede borrar restricciones y se reconstruye la tabla."""
+    if conn.dialect.name == "sqlite":
+        def ajustar(copia):
+            for restriccion in [r for r in copia.constraints if r.name == vieja]:
+                copia.constraints.discard(restriccion)
+            copia.append_constraint(UniqueConstraint(*columnas, name=nueva))
+        await conn.run_sync(_reconstruir_tabla_sqlite, tabla, ajustar)
+    else:
+        await conn.execute(text(f"ALTER TABLE {tabla} DROP CONSTRAINT IF EXISTS {vieja}"))
+        await conn.execute(text(f"ALTER TABLE {tabla} ADD CONSTRAINT {nueva} UNIQUE ({', '.join(columnas)})"))
+
+
+def _reconstruir_tabla_sqlite(sync_conn, tabla, ajustar):
+    """Copia `tabla` a una tabla nueva que `ajustar(nueva)` modifica antes de crearla
+    y la reemplaza, con los mismos datos e índices."""
+    vieja = Table(tabla, MetaData(), autoload_with=sync_conn)
+    indices = [
+        (indice.name, indice.unique, [c.name for c in indice.columns])
+        for indice in vieja.indexes
+    ]
+    temporal = f"{tabla}__nueva"
+    nueva = vieja.to_metadata(MetaData(), name=temporal)
+    ajustar(nueva)
+    nueva.indexes.clear()
+    nueva.create(sync_conn)
+
+    columnas = ", ".join(c.name for c in vieja.columns)
+    sync_conn.execute(text(f"INSERT INTO {temporal} ({columnas}) SELECT {columnas} FROM {tabla}"))
+    vieja.drop(sync_conn)
+    sync_conn.execute(text(f"ALTER TABLE {temporal} RENAME TO {tabla}"))
+    for nombre, unico, columnas_indice in indices:
+        sync_conn.execute(text(
+            f"CREATE {'UNIQUE ' if unico else ''}INDEX {nombre} ON {tabla} ({', '.join(columnas_indice)})"
+        ))
+
+
+async def agregar_columna(conn, tabla, columna, definicion):
+    """Agrega `tabla.columna` si todavía no existe (create_all ya la crea en bases nuevas)."""
+    if columna in await conn.run_sync(_columnas, tabla):
+        return False
+    await conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}"))
+    return True
+
+
+async def _insertar_ignorando(conn, tabla, columnas, claves, filas):
+    sentencia = text(
+        f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(':' + c for c in columnas)}) "
+        f"ON CONFLICT({', '.join(claves)}) DO NOTHING"
+    )
+    for i in range(0, len(filas), TAMANO_LOTE):
+        await conn.execute(sentencia, filas[i:i + TAMANO_LOTE])
+
+
+def _json(valor, defecto):
+    if valor is None:
+        return defecto
+    return json.loads(valor) if isinstance(valor, str) else valor
+
+
+@migracion(1, "Índices de score_history por timestamp y por (user_name, timestamp)")
+async def _indices_score_history(conn):
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_score_history_timestamp ON score_history (timestamp)"))
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_score_history_user_name_timestamp ON score_history (user_name, timestamp)"
+    ))
+
+
+@migracion(2, "Asistencia y justificaciones de columnas JSON a event_attendance y user_justification")
+async def _asistencia_desde_json(conn):
+    asistencias = []
+    if {"linked_users", "late_users", "penalties"} <= set(await conn.run_sync(_columnas, "events")):
+        result = await conn.execute(text(
+            "SELECT name, timestamp, puntaje, linked_users, late_users, penalties FROM events "
+            "WHERE linked_users IS NOT NULL OR late_users IS NOT NULL OR penalties IS NOT NULL"
+        ))
+        for name, timestamp, puntaje, linked_users, late_users, penalties in result.fetchall():
+            asistencia = {}
+            for user in _json(linked_users, []):
+                asistencia[user] = ("ASISTIÓ", puntaje)
+            for user, penalizacion in _json(penalties, {}).items():
+                asistencia[user] = ("NO ASISTIÓ", -penalizacion)
+            for user in _json(late_users, []):
+                asistencia[user] = ("TARDE", puntaje)
+            asistencias.extend(
+                {"event_name": name, "event_timestamp": timestamp, "user_name": user, "status": estado, "delta": delta}
+                for user, (estado, delta) in asistencia.items()
+            )
+        await _insertar_ignorando(
+            conn, "event_attendance", ["event_name", "event_timestamp", "user_name", "status", "delta"],
+            ["event_name", "event_timestamp", "user_name"], asistencias
+        )
+        await conn.execute(text("UPDATE events SET linked_users = NULL, late_users = NULL, penalties = NULL"))
+
+    justificaciones = []
+    if "justified_events" in await conn.run_sync(_columnas, "users"):
+        result = await conn.execute(text("SELECT name, justified_events FROM users WHERE justified_events IS NOT NULL"))
+        for name, justified_events in result.fetchall():
+            justificaciones.extend(
+                {"user_name": name, "event_name": evento} for evento in _json(justified_events, [])
+            )
+        await _insertar_ignorando(
+            conn, "user_justification", ["user_name", "event_name"],
+            ["user_name", "event_name"], justificaciones
+        )
+        await conn.execute(text("UPDATE users SET justified_events = NULL"))
+
+    logger.info(f"{len(asistencias)} asistencia(s) y {len(justificaciones)} justificación(es) migradas.")
+
+
+@migracion(3, "Índice único en users.discord_id")
+async def _discord_id_unico(conn):
+    # Ante duplicados el bot ya resolvía por el usuario creado último; se conserva ese.
+    result = await conn.execute(text(
+        "SELECT discord_id, MAX(id) FROM users WHERE discord_id IS NOT NULL "
+        "GROUP BY discord_id HAVING COUNT(*) > 1"
+    ))
+    for discord_id, conservar in result.fetchall():
+        result_nombres = await conn.execute(
+            text("SELECT name FROM users WHERE discord_id = :d AND id <> :id"),
+            {"d": discord_id, "id": conservar}
+        )
+        nombres = [row[0] for row in result_nombres]
+        await conn.execute(
+            text("UPDATE users SET discord_id = NULL WHERE discord_id = :d AND id <> :id"),
+            {"d": discord_id, "id": conservar}
+        )
+        logger.warning(f"discord_id {discord_id} estaba repetido; se desvinculó de: {', '.join(nombres)}.")
+    await conn.execute(text("DROP INDEX IF EXISTS ix_users_discord_id"))
+    await conn.execute(text("CREATE UNIQUE INDEX ix_users_discord_id ON users (discord_id)"))
+
+
+@migracion(4, "score_history.razon pasa de VARCHAR(255) a TEXT")
+async def _razon_texto(conn):
+    await cambiar_tipo_columna(conn, "score_history", "razon", Text())
+
+
+@migracion(5, "Tabla db_state con el contador de cambios")
+async def _db_state(conn):
+    await conn.execute(text("CREATE TABLE IF NOT EXISTS db_state (id INTEGER PRIMARY KEY, cambios BIGINT NOT NULL)"))
+    await conn.execute(text("INSERT INTO db_state (id, cambios) VALUES (1, 0) ON CONFLICT(id) DO NOTHING"))
+
+
+@migracion(6, "events.revertido y event_attendance.justificacion_consumida para !revertirevento")
+async def _reversion_eventos(conn):
+    await agregar_columna(conn, "events", "revertido", "BOOLEAN NOT NULL DEFAULT FALSE")
+    await agregar_columna(conn, "event_attendance", "justificacion_consumida", "BOOLEAN NOT NULL DEFAULT FALSE")
+
+
+@migracion(7, "Tabla aliases con los alias de OCR que estaban en utils.clean_name")
+async def _aliases(conn):
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS aliases (id INTEGER PRIMARY KEY, patron VARCHAR(255) UNIQUE, nombre VARCHAR(255))"
+    ))
+    # En el orden en que clean_name los probaba, que pasa a ser su prioridad.
+    iniciales = [
+        ("abyss", "abyss"), ("mob", "mob"), ("killa", "Killa"), ("nebu", "xNebu"),
+        ("tinta china", "ャンクス"), ("rjdi0", "rjdio"), ("ridio", "rjdio"), ("dato", "d4to"),
+        ("redf 4 wkez", "redfawkes"), ("redf 4wkez", "redfawkes")
+    ]
+    await _insertar_ignorando(
+        conn, "aliases", ["patron", "nombre"], ["patron"],
+        [{"patron": patron, "nombre": nombre} for patron, nombre in iniciales]
+    )
+
+
+@migracion(8, "event_attendance por corrida: event_timestamp en la clave única")
+async def _asistencia_por_corrida(conn):
+    tipo = DateTime().compile(dialect=conn.dialect)
+    if not await agregar_columna(conn, "event_attendance", "event_timestamp", tipo):
+        return
+    # Hasta ahora cada evento tenía solo la asistencia de su última corrida, la de events.
+    await conn.execute(text(
+        "UPDATE event_attendance SET event_timestamp = "
+        "(SELECT e.timestamp FROM events e WHERE e.name = event_attendance.event_name)"
+    ))
+    await reemplazar_restriccion_unica(
+        conn, "event_attendance", "uq_event_attendance_event_user", "uq_event_attendance_corrida_user",
+        ["event_name", "event_timestamp", "user_name"]
+    )
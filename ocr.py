@@ -0,0 +1,309 @@
+import os
+import abc
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import aiohttp
+
+import preprocesado
+
+logger = logging.getLogger("ocr")
+
+# Motor de OCR: "ocrspace" (API externa, por defecto) o "tesseract" (local, en el pool de procesos).
+OCR_BACKEND = os.getenv("OCR_BACKEND", "ocrspace").lower()
+
+OCR_SPACE_API_KEY = os.getenv("OCR_SPACE_API_KEY", "")
+OCR_URL = os.getenv("OCR_URL", "https://api.ocr.space/parse/image")
+# Imágenes procesadas a la vez; el plan gratuito de OCR.Space limita las conexiones.
+OCR_CONCURRENCIA = int(os.getenv("OCR_CONCURRENCIA", 4))
+OCR_REINTENTOS = int(os.getenv("OCR_REINTENTOS", 3))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", 60))
+# Espera antes del primer reintento; se duplica en cada uno, con algo de azar.
+OCR_ESPERA_BASE = float(os.getenv("OCR_ESPERA_BASE", 1.0))
+
+# Tesseract: ejecutable y modelo de idioma (tesseract-ocr-spa en Debian/Ubuntu).
+OCR_TESSERACT_CMD = os.getenv("OCR_TESSERACT_CMD", "tesseract")
+OCR_TESSERACT_IDIOMA = os.getenv("OCR_TESSERACT_IDIOMA", "spa")
+
+# Respuestas que vale la pena reintentar: límite de tasa y errores del servidor.
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+# Resultados por sha256 de la imagen: la misma captura subida de nuevo no vuelve a la API.
+OCR_CACHE_TAMANO = int(os.getenv("OCR_CACHE_TAMANO", 256))
+# Opcional: directorio donde los resultados sobreviven a un reinicio durante OCR_CACHE_TTL_HORAS.
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR")
+OCR_CACHE_TTL = float(os.getenv("OCR_CACHE_TTL_HORAS", 24)) * 3600
+
+# Preprocesado antes de subir: recorte a la columna de nombres ("x0,y0,x1,y1" en
+# fracciones de la imagen), escala de grises y ancho máximo. OCR_PREPROCESAR=0 lo apaga.
+OCR_PREPROCESAR = os.getenv("OCR_PREPROCESAR", "1") != "0"
+OCR_RECORTE = preprocesado.parsear_recorte(os.getenv("OCR_RECORTE", ""))
+OCR_ANCHO_MAX = int(os.getenv("OCR_ANCHO_MAX", 1600))
+OCR_PROCESOS = int(os.getenv("OCR_PROCESOS", min(2, os.cpu_count() or 1)))
+
+_backend = None
+_procesos = None
+_cache = OrderedDict()
+# Imágenes que se están leyendo ahora: una repetida en el mismo lote espera a la primera.
+_en_curso = {}
+
+metricas = {
+    "aciertos_memoria": 0,
+    "aciertos_disco": 0,
+    "fallos": 0,
+}
+
+
+class ErrorOCR(Exception):
+    """El OCR no pudo leer una imagen; el mensaje se muestra tal cual al usuario."""
+
+
+def _obtener_procesos():
+    global _procesos
+    if _procesos is None:
+        _procesos = ProcessPoolExecutor(max_workers=OCR_PROCESOS)
+    return _procesos
+
+
+async def cerrar():
+    global _backend, _procesos
+    if _backend is not None:
+        await _backend.cerrar()
+    _backend = None
+    if _procesos is not None:
+        await asyncio.to_thread(_procesos.shutdown, cancel_futures=True)
+    _procesos = None
+
+
+class BackendOCR(abc.ABC):
+    """Motor de OCR detrás de !asistencia: recibe la imagen ya preprocesada y
+    devuelve sus líneas de texto no vacías, o lanza ErrorOCR."""
+    nombre = ""
+
+    @abc.abstractmethod
+    async def leer(self, nombre_archivo: str, datos: bytes, filetype: str) -> list:
+        ...
+
+    def firma(self) -> str:
+        """Motor y ajustes que cambian el texto leído; forma parte de la clave de la caché."""
+        return self.nombre
+
+    async def cerrar(self):
+        pass
+
+
+class BackendOCRSpace(BackendOCR):
+    nombre = "ocrspace"
+
+    def __init__(self):
+        self._sesion = None
+        self._semaforo = asyncio.Semaphore(OCR_CONCURRENCIA)
+
+    def _obtener_sesion(self):
+        # Una sola sesión para todo el bot: reutiliza las conexiones TLS entre imágenes.
+        if self._sesion is None or self._sesion.closed:
+            self._sesion = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=OCR_CONCURRENCIA),
+                timeout=aiohttp.ClientTimeout(total=OCR_TIMEOUT)
+            )
+        return self._sesion
+
+    async def cerrar(self):
+        if self._sesion is not None and not self._sesion.closed:
+            await self._sesion.close()
+        self._sesion = None
+
+    async def _enviar(self, nombre_archivo, datos, filetype):
+        formulario = aiohttp.FormData()
+        formulario.add_field("filename", datos, filename=nombre_archivo)
+        formulario.add_field("apikey", OCR_SPACE_API_KEY)
+        formulario.add_field("language", "spa")
+        formulario.add_field("OCREngine", "2")
+        formulario.add_field("filetype", filetype)
+        async with self._obtener_sesion().post(OCR_URL, data=formulario) as response:
+            if response.status in ESTADOS_REINTENTABLES:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history, status=response.status, message=response.reason
+                )
+            if response.status >= 400:
+                raise ErrorOCR(f"OCR.Space rechazó {nombre_archivo}: {response.status} {response.reason}")
+            return await response.json(content_type=None)
+
+    async def leer(self, nombre_archivo, datos, filetype):
+        """Reintenta los errores de red, los timeouts, las respuestas 429/5xx y las
+        que no son JSON; lanza ErrorOCR si no lo consigue."""
+        async with self._semaforo:
+            for intento in range(OCR_REINTENTOS + 1):
+                try:
+                    result = await self._enviar(nombre_archivo, datos, filetype)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    # ValueError: cuerpo que no es JSON, típico de una página de error del proxy.
+                    if intento == OCR_REINTENTOS:
+                        raise ErrorOCR(f"Error al conectar con OCR.Space: {str(e) or type(e).__name__}")
+                    espera = OCR_ESPERA_BASE * 2 ** intento * random.uniform(0.8, 1.2)
+                    logger.warning(f"OCR de '{nombre_archivo}' falló ({str(e) or type(e).__name__}); reintento en {espera:.1f} s.")
+                    await asyncio.sleep(espera)
+
+        if result.get("IsErroredOnProcessing"):
+            err_msg = (result.get("ErrorMessage") or ["Desconocido"])[0]
+            raise ErrorOCR(f"OCR.Space reportó error en {nombre_archivo}: {err_msg}")
+        parsed_results = result.get("ParsedResults") or []
+        if not parsed_results:
+            raise ErrorOCR(f"OCR.Space no devolvió resultados para {nombre_archivo}.")
+        ocr_text = parsed_results[0].get("ParsedText", "")
+        return [l.strip() for l in ocr_text.splitlines() if l.strip()]
+
+
+class BackendTesseract(BackendOCR):
+    """Tesseract local en el pool de procesos: sin red ni límites de tasa, a costa
+    de CPU. La concurrencia la acota OCR_PROCESOS."""
+    nombre = "tesseract"
+
+    def firma(self):
+        return f"{self.nombre}:{OCR_TESSERACT_IDIOMA}"
+
+    async def leer(self, nombre_archivo, datos, filetype):
+        loop = asyncio.get_running_loop()
+        try:
+            texto = await loop.run_in_executor(
+                _obtener_procesos(), preprocesado.leer_con_tesseract, datos, OCR_TESSERACT_IDIOMA, OCR_TESSERACT_CMD
+            )
+        except FileNotFoundError:
+            raise ErrorOCR(f"No se encontró Tesseract ('{OCR_TESSERACT_CMD}'); instálalo o usa OCR_BACKEND=ocrspace.")
+        except RuntimeError as e:
+            raise ErrorOCR(f"Tesseract no pudo leer {nombre_archivo}: {e}")
+        return [l.strip() for l in texto.splitlines() if l.strip()]
+
+
+BACKENDS = {backend.nombre: backend for backend in (BackendOCRSpace, BackendTesseract)}
+
+if OCR_BACKEND not in BACKENDS:
+    raise ValueError(f"OCR_BACKEND inválido: '{OCR_BACKEND}'. Opciones: {', '.join(BACKENDS)}.")
+
+
+def obtener_backend() -> BackendOCR:
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[OCR_BACKEND]()
+    return _backend
+
+
+async def _preprocesar(nombre_archivo, datos):
+    """(bytes, filetype) a subir. El trabajo de imagen corre en el pool de procesos;
+    si falla se sube la imagen original."""
+    if OCR_PREPROCESAR:
+        loop = asyncio.get_running_loop()
+        try:
+            preparada = await loop.run_in_executor(
+                _obtener_procesos(), preprocesado.preparar_imagen, datos, OCR_RECORTE, OCR_ANCHO_MAX
+            )
+            return preparada, "PNG"
+        except Exception:
+            logger.exception(f"No se pudo preprocesar '{nombre_archivo}'; se envía la imagen original.")
+    extension = nombre_archivo.rsplit(".", 1)[-1].upper()
+    return datos, "JPG" if extension in ("JPG", "JPEG") else "PNG"
+
+
+def metricas_cache() -> dict:
+    return {**metricas, "entradas": len(_cache)}
+
+
+def _clave(datos):
+    # Además de los bytes, todo lo que cambia la lectura: el motor y el preprocesado.
+    # Así un cambio de recorte o de backend no reutiliza lecturas hechas con los anteriores.
+    backend = obtener_backend()
+    ajustes = f"{backend.firma()}|{OCR_PREPROCESAR}|{OCR_RECORTE}|{OCR_ANCHO_MAX}"
+    resumen = hashlib.sha256(ajustes.encode("utf-8"))
+    resumen.update(datos)
+    return f"{backend.nombre}-{resumen.hexdigest()}"
+
+
+def _ruta_disco(clave):
+    return os.path.join(OCR_CACHE_DIR, f"{clave}.json")
+
+
+def _leer_disco(clave):
+    ruta = _ruta_disco(clave)
+    try:
+        if time.time() - os.path.getmtime(ruta) > OCR_CACHE_TTL:
+            os.remove(ruta)
+            return None
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_disco(clave, lineas):
+    os.makedirs(OCR_CACHE_DIR, exist_ok=True)
+    temporal = f"{_ruta_disco(clave)}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(lineas, f, ensure_ascii=False)
+    os.replace(temporal, _ruta_disco(clave))
+
+
+def _guardar_en_memoria(clave, lineas):
+    _cache[clave] = lineas
+    _cache.move_to_end(clave)
+    while len(_cache) > OCR_CACHE_TAMANO:
+        _cache.popitem(last=False)
+
+
+async def _buscar_en_cache(clave):
+    lineas = _cache.get(clave)
+    if lineas is not None:
+        _cache.move_to_end(clave)
+        metricas["aciertos_memoria"] += 1
+        return lineas
+    if OCR_CACHE_DIR:
+        lineas = await asyncio.to_thread(_leer_disco, clave)
+        if lineas is not None:
+            _guardar_en_memoria(clave, lineas)
+            metricas["aciertos_disco"] += 1
+            return lineas
+    return None
+
+
+def _liberar(clave):
+    def terminada(tarea):
+        _en_curso.pop(clave, None)
+        if not tarea.cancelled():
+            # Quien esperaba ya recibió la excepción; así no se reporta como no vista.
+            tarea.exception()
+    return terminada
+
+
+async def leer_imagen(nombre_archivo: str, datos: bytes) -> list:
+    """Líneas de texto no vacías de la imagen, desde la caché si ya se leyó. Solo
+    se guardan las lecturas exitosas; los errores se vuelven a intentar."""
+    clave = _clave(datos)
+    lineas = await _buscar_en_cache(clave)
+    if lineas is not None:
+        return list(lineas)
+    if clave in _en_curso:
+        metricas["aciertos_memoria"] += 1
+        return list(await asyncio.shield(_en_curso[clave]))
+
+    metricas["fallos"] += 1
+    tarea = _en_curso[clave] = asyncio.ensure_future(_leer_remoto(nombre_archivo, datos))
+    tarea.add_done_callback(_liberar(clave))
+    lineas = await asyncio.shield(tarea)
+    _guardar_en_memoria(clave, lineas)
+    if OCR_CACHE_DIR:
+        try:
+            await asyncio.to_thread(_escribir_disco, clave, lineas)
+        except OSError:
+            logger.exception(f"No se pudo guardar el OCR de '{nombre_archivo}' en {OCR_CACHE_DIR}.")
+    return list(lineas)
+
+
+async def _leer_remoto(nombre_archivo, datos):
+    datos, filetype = await _preprocesar(nombre_archivo, datos)
+    return await obtener_backend().leer(nombre_archivo, datos, filetype)
@@ -0,0 +1,134 @@
+import os
+import time
+import asyncio
+import logging
+
+import data_manager
+
+logger = logging.getLogger("persistence_queue")
+
+DEBOUNCE_SEGUNDOS = float(os.getenv("PERSISTENCIA_DEBOUNCE", 0.5))
+MAX_PENDIENTES = int(os.getenv("PERSISTENCIA_MAX_PENDIENTES", 200))
+
+# Orden en que se vacían las tablas dentro de un mismo flush.
+_GUARDADOS = {
+    "users": data_manager.guardar_datos,
+    "events": data_manager.guardar_eventos,
+    "registered_events": data_manager.guardar_eventos_registrados,
+    "partys": data_manager.save_partys,
+}
+
+_pendientes = set()
+_hay_pendientes = asyncio.Event()
+_lote_lleno = asyncio.Event()
+_trabajador = None
+
+metricas = {
+    "encolados": 0,
+    "coalescidos": 0,
+    "flushes": 0,
+    "errores": 0,
+    "ultimo_flush_ms": 0.0,
+    "max_flush_ms": 0.0,
+    "total_flush_ms": 0.0,
+}
+
+
+def encolar(tabla: str, clave=None):
+    """Registra que la fila `clave` de `tabla` cambió en memoria.
+
+    Varias escrituras a la misma fila antes del próximo flush se agrupan en una sola.
+    """
+    if tabla not in _GUARDADOS:
+        raise ValueError(f"Tabla desconocida para persistir: {tabla}")
+    intento = (tabla, clave)
+    # Quien encola ya cambió la memoria.
+    data_manager.marcar_modificado()
+    metricas["encolados"] += 1
+    if intento in _pendientes:
+        metricas["coalescidos"] += 1
+    else:
+        _pendientes.add(intento)
+    _hay_pendientes.set()
+    if len(_pendientes) >= MAX_PENDIENTES:
+        _lote_lleno.set()
+
+
+def profundidad() -> int:
+    return len(_pendientes)
+
+
+def metricas_actuales() -> dict:
+    return {**metricas, "profundidad": profundidad()}
+
+
+async def _flush():
+    lote = set(_pendientes)
+    _pendientes.clear()
+    _lote_lleno.clear()
+    tablas = {tabla for tabla, _ in lote}
+
+    inicio = time.perf_counter()
+    for tabla, guardar in _GUARDADOS.items():
+        if tabla not in tablas:
+            continue
+        try:
+            await guardar()
+        except Exception:
+            metricas["errores"] += 1
+            logger.exception(f"Error al persistir '{tabla}'; se reintentará en el próximo flush.")
+            _pendientes.update(intento for intento in lote if intento[0] == tabla)
+
+    ms = (time.perf_counter() - inicio) * 1000
+    metricas["flushes"] += 1
+    metricas["ultimo_flush_ms"] = ms
+    metricas["max_flush_ms"] = max(metricas["max_flush_ms"], ms)
+    metricas["total_flush_ms"] += ms
+
+
+async def _procesar():
+    while True:
+        await _hay_pendientes.wait()
+        try:
+            await asyncio.wait_for(_lote_lleno.wait(), timeout=DEBOUNCE_SEGUNDOS)
+        except asyncio.TimeoutError:
+            pass
+        _hay_pendientes.clear()
+        await _flush()
+        if _pendientes:
+            # Quedaron intentos por un error: reintentar tras otra ventana.
+            await asyncio.sleep(DEBOUNCE_SEGUNDOS)
+            _hay_pendientes.set()
+
+
+def iniciar():
+    global _trabajador
+    if _trabajador is None or _trabajador.done():
+        _trabajador = asyncio.create_task(_procesar())
+        logger.info("Cola de persistencia iniciada.")
+
+
+async def detener():
+    """Detiene el trabajador y vacía todo lo pendiente antes de salir. Devuelve
+    True si no quedó nada sin persistir."""
+    global _trabajador
+    if _trabajador is not None:
+        _trabajador.cancel()
+        try:
+            await _trabajador
+        except asyncio.CancelledError:
+            pass
+        _trabajador = None
+
+    # Un flush cortado por la cancelación ya sacó sus intentos de la cola; como
+    # cada guardado solo escribe diferencias, repasar todas las tablas es barato.
+    _pendientes.update((tabla, None) for tabla in _GUARDADOS)
+    intentos = 0
+    while _pendientes and intentos < 3:
+        await _flush()
+        intentos += 1
+    if _pendientes:
+        logger.error(f"No se pudieron persistir {len(_pendientes)} cambio(s) al cerrar.")
+    else:
+        logger.info("Cola de persistencia vaciada.")
+    return not _pendientes
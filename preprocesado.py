@@ -0,0 +1,47 @@
+import io
+import os
+import subprocess
+
+from PIL import Image, ImageOps
+
+
+def parsear_recorte(valor: str):
+    """"x0,y0,x1,y1" en fracciones del ancho y alto (0 a 1) -> tupla, o None si está vacío."""
+    if not valor:
+        return None
+    partes = tuple(float(p) for p in valor.split(","))
+    if len(partes) != 4 or not (0 <= partes[0] < partes[2] <= 1 and 0 <= partes[1] < partes[3] <= 1):
+        raise ValueError(f"Recorte inválido: '{valor}'. Se espera x0,y0,x1,y1 entre 0 y 1.")
+    return partes
+
+
+def preparar_imagen(datos: bytes, recorte=None, ancho_max: int = 1600) -> bytes:
+    """Recorta a la columna de nombres, pasa a escala de grises, reduce a
+    `ancho_max` y devuelve un PNG. Corre en un proceso aparte: todo es CPU."""
+    with Image.open(io.BytesIO(datos)) as original:
+        imagen = ImageOps.exif_transpose(original)
+        if recorte is not None:
+            ancho, alto = imagen.size
+            x0, y0, x1, y1 = recorte
+            imagen = imagen.crop((round(x0 * ancho), round(y0 * alto), round(x1 * ancho), round(y1 * alto)))
+        imagen = ImageOps.autocontrast(imagen.convert("L"))
+        if imagen.width > ancho_max:
+            imagen = imagen.resize((ancho_max, round(imagen.height * ancho_max / imagen.width)), Image.LANCZOS)
+        salida = io.BytesIO()
+        imagen.save(salida, format="PNG", optimize=True)
+    return salida.getvalue()
+
+
+def leer_con_tesseract(datos: bytes, idioma: str = "spa", comando: str = "tesseract") -> str:
+    """Texto de la imagen según Tesseract. Corre en el pool de procesos; lanza
+    FileNotFoundError si el ejecutable no existe y RuntimeError si falla."""
+    # --psm 6: un bloque de texto uniforme, como la columna de nombres de la captura.
+    # Un hilo por proceso: el paralelismo ya lo da el pool.
+    resultado = subprocess.run(
+        [comando, "stdin", "stdout", "-l", idioma, "--psm", "6"],
+        input=datos, capture_output=True, env={**os.environ, "OMP_THREAD_LIMIT": "1"}
+    )
+    if resultado.returncode != 0:
+        error = resultado.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"código de salida {resultado.returncode}")
+    return resultado.stdout.decode("utf-8", "replace")
@@ -0,0 +1,30 @@
+# Códigos de estado de la tabla de deltas.
+VACACIONES, ASISTIO, JUSTIFICADO, NO_ASISTIO = range(4)
+NOMBRES_ESTADO = ("VACACIONES", "ASISTIÓ", "JUSTIFICADO", "NO ASISTIÓ")
+
+
+def puntuar(usuarios, nombre_evento, asistentes, puntaje, noresta, event_time, ya_consumidas=()):
+    """Calcula en una pasada el estado y el delta de DKP de cada usuario de
+    `usuarios` (nombre -> UserRecord). Devuelve (nombre, estado, delta,
+    consume_justificacion) por usuario, en el orden de `usuarios`.
+
+    Reglas: quien asiste suma `puntaje`; quien falta justificado (por ausencia vigente
+    o por !ausencia al evento) resta `puntaje`; quien falta sin justificar resta el doble.
+    Con `noresta` solo suman los asistentes. Los usuarios en vacaciones no cambian.
+    `ya_consumidas` son usuarios cuya justificación del evento ya se usó.
+    """
+    filas = []
+    for nombre, datos in usuarios.items():
+        if datos.status == "vacaciones":
+            filas.append((nombre, VACACIONES, 0, False))
+            continue
+        justificado = nombre_evento in datos.justified_events and nombre not in ya_consumidas
+        if nombre in asistentes:
+            filas.append((nombre, ASISTIO, puntaje, justificado))
+        elif noresta:
+            filas.append((nombre, NO_ASISTIO, 0, False))
+        elif justificado or (datos.absence_until is not None and datos.absence_until >= event_time):
+            filas.append((nombre, JUSTIFICADO, -puntaje, justificado))
+        else:
+            filas.append((nombre, NO_ASISTIO, -2 * puntaje, False))
+    return filas
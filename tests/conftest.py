@@ -0,0 +1,89 @@
+"""Cada prueba corre sobre una base SQLite nueva en un directorio temporal. No se
+usa pytest-asyncio: las pruebas llaman a asyncio.run."""
+import os
+import sys
+import asyncio
+
+import pytest
+
+os.environ.setdefault("DB_URL", "sqlite+aiosqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import data_manager
+from data_manager import UserRecord
+
+
+@pytest.fixture
+def motor(tmp_path, monkeypatch):
+    """Engine de data_manager apuntando a un archivo vacío, sin tablas. Sin pool,
+    para que cada asyncio.run abra sus propias conexiones."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dkp.db'}", poolclass=NullPool)
+    monkeypatch.setattr(data_manager, "engine", engine)
+    monkeypatch.setattr(data_manager, "AsyncSessionLocal", sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(data_manager, "SNAPSHOT_PATH", None)
+    monkeypatch.setattr(data_manager, "_locks_usuario", {})
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def base(motor):
+    """Base con el esquema actual y los usuarios jugador0..4 guardados, ya cargada en memoria."""
+    async def preparar():
+        await data_manager.init_db()
+        await data_manager.cargar_todos_los_datos()
+        for i in range(5):
+            data_manager.user_data[f"jugador{i}"] = UserRecord(discord_id=100 + i)
+        await data_manager.guardar_datos()
+
+    asyncio.run(preparar())
+    return motor
+
+
+async def consultar(sql, **params):
+    async with data_manager.AsyncSessionLocal() as session:
+        result = await session.execute(text(sql), params)
+        return [tuple(row) for row in result]
+
+
+async def estado_base():
+    """Todo lo que un evento escribe en la base, comparable con ==."""
+    return {
+        "users": await consultar("SELECT name, score FROM users ORDER BY name"),
+        "score_history": await consultar("SELECT user_name, timestamp, delta, razon FROM score_history ORDER BY id"),
+        "events": await consultar("SELECT name, timestamp, puntaje, revertido FROM events ORDER BY name"),
+        "event_attendance": await consultar(
+            "SELECT event_name, user_name, status, delta, justificacion_consumida FROM event_attendance "
+            "ORDER BY event_name, user_name"
+        ),
+        "user_justification": await consultar("SELECT user_name, event_name FROM user_justification ORDER BY user_name, event_name"),
+        "db_state": await consultar("SELECT cambios FROM db_state"),
+    }
+
+
+def estado_memoria():
+    """Lo mismo que estado_base() pero de la memoria, incluida la copia de lo persistido."""
+    return {
+        "usuarios": {
+            nombre: (record.score, sorted(record.justified_events))
+            for nombre, record in data_manager.user_data.items()
+        },
+        "historial": {
+            nombre: [(e.timestamp, e.delta, e.razon) for e in data_manager.score_history.recientes(nombre)]
+            for nombre in data_manager.user_data
+        },
+        "eventos": {
+            nombre: (evento.timestamp, evento.puntaje, dict(evento.asistencia))
+            for nombre, evento in data_manager.events_info.items()
+        },
+        "usuarios_persistidos": {nombre: dict(params) for nombre, params in data_manager._usuarios_persistidos.items()},
+        "eventos_persistidos": dict(data_manager._eventos_persistidos),
+        "asistencias_persistidas": dict(data_manager._asistencias_persistidas),
+        "justificaciones_persistidas": set(data_manager._justificaciones_persistidas),
+        "version_estado": data_manager.version_estado,
+    }
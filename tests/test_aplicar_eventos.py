@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import data_manager
+from data_manager import ASISTIO, JUSTIFICADO, NO_ASISTIO, TARDE, aplicar_eventos, bloquear_usuarios
+from event_logic import calcular_evento
+from conftest import consultar, estado_base, estado_memoria
+
+
+async def justificar(nombre, evento):
+    data_manager.user_data[nombre].justified_events.add(evento)
+    await data_manager.guardar_datos()
+
+
+async def cargar_evento(nombre, puntaje, asistentes, cuando=None):
+    plan = calcular_evento(nombre, puntaje, False, set(asistentes), cuando or datetime.utcnow())
+    async with bloquear_usuarios(data_manager.user_data.keys()):
+        await aplicar_eventos([plan])
+    return plan
+
+
+def test_aplica_evento_en_memoria_y_base(base):
+    async def escenario():
+        await justificar("jugador2", "PVP")
+        plan = await cargar_evento("PVP", 10, ["jugador0", "jugador1"])
+        return plan, await estado_base()
+
+    plan, bd = asyncio.run(escenario())
+
+    assert plan.justificaciones == ["jugador2"]
+    scores = {nombre: record.score for nombre, record in data_manager.user_data.items()}
+    assert scores["jugador0"] == scores["jugador1"] == 10
+    assert scores["jugador2"] == -10
+    assert scores["jugador3"] == scores["jugador4"] == -20
+    assert bd["users"] == sorted(scores.items())
+    assert data_manager.user_data["jugador2"].justified_events == set()
+    assert bd["user_justification"] == []
+
+    asistencia = {fila[1]: fila[2:] for fila in bd["event_attendance"]}
+    assert asistencia["jugador0"] == (ASISTIO, 10, False)
+    assert asistencia["jugador2"] == (JUSTIFICADO, -10, True)
+    assert asistencia["jugador3"][0] == NO_ASISTIO
+    assert data_manager.events_info["PVP"].asistencia == {nombre: fila[:2] for nombre, fila in asistencia.items()}
+    assert len(bd["score_history"]) == len(data_manager.score_history) == len(plan.cambios)
+
+
+@pytest.mark.parametrize("paso", ["_sumar_scores", "_insertar_historial", "_escribir_asistencia", "_escribir_justificaciones"])
+def test_falla_a_mitad_del_evento_no_cambia_nada(base, monkeypatch, paso):
+    """Una escritura que falla a mitad de la transacción deja la base y la memoria
+    como estaban, y el evento se puede volver a aplicar después."""
+    async def falla(*args, **kwargs):
+        raise RuntimeError("base caída")
+
+    async def escenario():
+        await justificar("jugador2", "PVP")
+        await cargar_evento("BOSS", 5, ["jugador0"])
+        antes = estado_memoria(), await estado_base()
+
+        with monkeypatch.context() as parche:
+            parche.setattr(data_manager, paso, falla)
+            with pytest.raises(RuntimeError, match="base caída"):
+                await cargar_evento("PVP", 10, ["jugador0", "jugador1"])
+        despues = estado_memoria(), await estado_base()
+
+        await cargar_evento("PVP", 10, ["jugador0", "jugador1"])
+        return antes, despues, await estado_base()
+
+    antes, despues, reintento = asyncio.run(escenario())
+
+    assert despues == antes
+    assert data_manager.user_data["jugador2"].justified_events == set()
+    assert "PVP" in data_manager.events_info
+    assert dict(reintento["users"])["jugador0"] == data_manager.user_data["jugador0"].score == 15
+    assert [fila[0] for fila in reintento["events"]] == ["BOSS", "PVP"]
+
+
+def test_cada_corrida_de_un_evento_conserva_su_asistencia(base):
+    """Los nombres de evento se repiten: cargar PVP otra vez no pisa la asistencia
+    de las corridas anteriores, y cada corrida cuenta en la tasa de asistencia."""
+    primera = datetime.utcnow() - timedelta(minutes=30)
+    segunda = datetime.utcnow()
+
+    async def escenario():
+        await cargar_evento("PVP", 10, ["jugador0", "jugador1"], primera)
+        await cargar_evento("PVP", 10, ["jugador1"], segunda)
+        # Una llegada tarde en la corrida vigente solo cambia esa corrida.
+        data_manager.events_info["PVP"].asistencia["jugador0"] = (TARDE, 10)
+        await data_manager.guardar_eventos()
+        return {
+            "filas": await consultar("SELECT COUNT(*) FROM event_attendance WHERE event_name = 'PVP'"),
+            "primera": await data_manager.asistentes_evento("PVP", primera),
+            "segunda": await data_manager.asistentes_evento("PVP", segunda),
+            "tasa0": await data_manager.tasa_asistencia("jugador0"),
+            "tasa1": await data_manager.tasa_asistencia("jugador1"),
+            "tasa2": await data_manager.tasa_asistencia("jugador2"),
+            "revertido": await data_manager.revertir_evento("PVP"),
+            "quedan": await data_manager.asistentes_evento("PVP", primera),
+        }
+
+    r = asyncio.run(escenario())
+
+    assert r["filas"] == [(10,)]
+    assert r["primera"] == ["jugador0", "jugador1"]
+    assert r["segunda"] == ["jugador0", "jugador1"]
+    assert r["tasa0"] == (2, 2)
+    assert r["tasa1"] == (2, 2)
+    assert r["tasa2"] == (0, 2)
+    # Revertir deshace solo la corrida vigente.
+    assert r["revertido"] is not None
+    assert r["quedan"] == ["jugador0", "jugador1"]
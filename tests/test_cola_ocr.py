@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+import cola_ocr
+import ocr
+
+
+class Adjunto:
+    def __init__(self, filename):
+        self.filename = filename
+
+
+class Mensaje:
+    async def edit(self, embed):
+        self.embed = embed
+
+
+class Canal:
+    async def send(self, embed):
+        return Mensaje()
+
+
+@pytest.fixture
+def cola(monkeypatch):
+    """Cola y métricas nuevas, con un solo trabajador que nunca termina de leer."""
+    async def colgado(adjunto):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(cola_ocr, "_cola", asyncio.Queue())
+    monkeypatch.setattr(cola_ocr, "_trabajadores", [])
+    monkeypatch.setattr(cola_ocr, "_informes", set())
+    monkeypatch.setattr(cola_ocr, "metricas", dict.fromkeys(cola_ocr.metricas, 0))
+    monkeypatch.setattr(cola_ocr, "OCR_TRABAJADORES", 1)
+    monkeypatch.setattr(cola_ocr, "OCR_INTERVALO_PROGRESO", 0.01)
+    monkeypatch.setattr(cola_ocr, "_leer", colgado)
+
+
+def test_detener_completa_el_trabajo_cortado(cola):
+    """Al cerrar el bot a mitad de un !asistencia, la captura en lectura y las que
+    esperaban en cola quedan con error, y el trabajo igual llama a al_terminar."""
+    async def escenario():
+        terminados = []
+
+        async def al_terminar(resultados):
+            terminados.append(resultados)
+
+        trabajo = await cola_ocr.encolar(Canal(), [Adjunto(f"{i}.png") for i in range(3)], al_terminar)
+        while not trabajo.leyendo:
+            await asyncio.sleep(0)
+        await cola_ocr.detener()
+        return trabajo, terminados
+
+    trabajo, terminados = asyncio.run(escenario())
+
+    assert trabajo.completo()
+    assert trabajo.leyendo == set()
+    assert len(terminados) == 1
+    assert all(isinstance(resultado, ocr.ErrorOCR) for resultado in terminados[0])
+    assert cola_ocr.metricas_actuales() == {
+        "trabajos": 1,
+        "trabajos_completados": 1,
+        "imagenes": 3,
+        "imagenes_pendientes": 0,
+        "errores": 3,
+        "trabajos_activos": 0,
+    }
@@ -0,0 +1,73 @@
+import asyncio
+
+import data_manager
+from data_manager import UserRecord, apply_delta
+from conftest import consultar
+
+
+async def scores_en_base():
+    return dict(await consultar("SELECT name, score FROM users"))
+
+
+async def recargar():
+    await data_manager.cargar_todos_los_datos()
+    return {nombre: record.score for nombre, record in data_manager.user_data.items()}
+
+
+def test_borrar_y_volver_a_crear_antes_de_guardar(base):
+    """!borrarusuario seguido de !vincular con el mismo nombre, sin un guardado en
+    el medio: la fila queda con el score del usuario nuevo, no con el del viejo."""
+    async def escenario():
+        await apply_delta("jugador0", 50, "Ajuste manual")
+        del data_manager.user_data["jugador0"]
+        data_manager.user_data["jugador0"] = UserRecord(discord_id=200)
+        await data_manager.guardar_datos()
+        return await scores_en_base(), await consultar("SELECT discord_id FROM users WHERE name = 'jugador0'"), await recargar()
+
+    bd, discord_id, recargados = asyncio.run(escenario())
+
+    assert bd["jugador0"] == 0
+    assert discord_id == [(200,)]
+    assert recargados["jugador0"] == 0
+
+
+def test_delta_a_usuario_recreado_antes_de_guardar(base):
+    async def escenario():
+        await apply_delta("jugador0", 50, "Ajuste manual")
+        del data_manager.user_data["jugador0"]
+        data_manager.user_data["jugador0"] = UserRecord(discord_id=100)
+        nuevo = await apply_delta("jugador0", 5, "Ajuste manual")
+        await data_manager.guardar_datos()
+        return nuevo, await scores_en_base(), await recargar()
+
+    nuevo, bd, recargados = asyncio.run(escenario())
+
+    assert nuevo == 5
+    assert bd["jugador0"] == recargados["jugador0"] == 5
+
+
+def test_renombrar_a_un_nombre_borrado_antes_de_guardar(base):
+    async def escenario():
+        await apply_delta("jugador1", 30, "Ajuste manual")
+        await apply_delta("jugador2", 7, "Ajuste manual")
+        del data_manager.user_data["jugador1"]
+        data_manager.user_data.renombrar("jugador2", "jugador1")
+        await data_manager.guardar_datos()
+        return await scores_en_base(), await recargar()
+
+    bd, recargados = asyncio.run(escenario())
+
+    assert "jugador2" not in bd
+    assert bd["jugador1"] == recargados["jugador1"] == 7
+    assert data_manager.user_data["jugador1"].discord_id == 102
+
+
+def test_guardar_usuario_sin_recrear_no_pisa_el_score(base):
+    """Un cambio de otra columna no escribe score: los incrementos van por apply_delta."""
+    async def escenario():
+        await apply_delta("jugador0", 50, "Ajuste manual")
+        data_manager.user_data["jugador0"].status = "vacaciones"
+        await data_manager.guardar_datos()
+        return await consultar("SELECT score, status FROM users WHERE name = 'jugador0'")
+
+    assert asyncio.run(escenario()) == [(50, "vacaciones")]
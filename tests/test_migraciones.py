@@ -0,0 +1,278 @@
+import json
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import BigInteger, Column, DateTime, Integer, JSON, MetaData, String, Table, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+import data_manager
+import migraciones
+from data_manager import ASISTIO, NO_ASISTIO, TARDE
+from conftest import consultar
+
+# El esquema con el que se creaban las bases antes de las migraciones: asistencia y
+# justificaciones en columnas JSON y discord_id sin índice único.
+esquema_original = MetaData()
+Table(
+    "users", esquema_original,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("discord_id", BigInteger, index=True),
+    Column("name", String(255), unique=True, index=True),
+    Column("score", Integer, default=0),
+    Column("absence_until", DateTime, nullable=True),
+    Column("justified_events", JSON, default=list),
+    Column("status", String(50), default="normal"),
+    Column("equipo", JSON, default=dict),
+)
+Table(
+    "events", esquema_original,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(255), unique=True, index=True),
+    Column("timestamp", DateTime),
+    Column("puntaje", Integer),
+    Column("linked_users", JSON, default=list),
+    Column("late_users", JSON, default=list),
+    Column("penalties", JSON, default=dict),
+)
+Table(
+    "registered_events", esquema_original,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(255), unique=True, index=True),
+)
+Table(
+    "score_history", esquema_original,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_name", String(255), index=True),
+    Column("timestamp", DateTime),
+    Column("delta", Integer),
+    Column("razon", String(255)),
+)
+Table(
+    "partys", esquema_original,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(255), unique=True, index=True),
+    Column("members", JSON, default=list),
+)
+
+
+def _usuario(id, discord_id, name, score, justified_events=(), absence_until=None, equipo=None):
+    return {
+        "id": id, "discord_id": discord_id, "name": name, "score": score,
+        "absence_until": absence_until.isoformat() if absence_until else None,
+        "justified_events": json.dumps(list(justified_events)), "status": "normal",
+        "equipo": json.dumps(equipo or {})
+    }
+
+
+def _evento(name, timestamp, puntaje, linked_users=(), late_users=(), penalties=None):
+    return {
+        "name": name, "timestamp": timestamp.isoformat(), "puntaje": puntaje,
+        "linked_users": json.dumps(list(linked_users)), "late_users": json.dumps(list(late_users)),
+        "penalties": json.dumps(penalties or {})
+    }
+
+
+@pytest.fixture
+def base_original(motor):
+    """Base con el esquema original y los datos escritos como los escribía el bot entonces."""
+    ahora = datetime.utcnow()
+
+    async def crear():
+        async with motor.begin() as conn:
+            await conn.run_sync(esquema_original.create_all)
+            await conn.execute(
+                text(
+                    "INSERT INTO users (id, discord_id, name, score, absence_until, justified_events, status, equipo) "
+                    "VALUES (:id, :discord_id, :name, :score, :absence_until, :justified_events, :status, :equipo)"
+                ),
+                [
+                    _usuario(1, 10, "Martin", 50, ["PVP", "BOSS"], equipo={"rol": "TANK"}),
+                    _usuario(2, 20, "Viejo", 5),
+                    _usuario(3, 20, "Nuevo", -20),
+                    _usuario(4, None, "SinCuenta", 0, absence_until=ahora + timedelta(days=2)),
+                ]
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO events (name, timestamp, puntaje, linked_users, late_users, penalties) "
+                    "VALUES (:name, :timestamp, :puntaje, :linked_users, :late_users, :penalties)"
+                ),
+                [
+                    _evento("PVP", ahora, 10, ["Martin"], ["Viejo"], {"Nuevo": 20, "Viejo": 20}),
+                    _evento("BOSS", ahora - timedelta(days=3), 5),
+                ]
+            )
+            await conn.execute(
+                text("INSERT INTO score_history (user_name, timestamp, delta, razon) VALUES (:user_name, :timestamp, :delta, :razon)"),
+                [
+                    {"user_name": "Martin", "timestamp": ahora.isoformat(), "delta": 10, "razon": "Evento PVP: ASISTIÓ"},
+                    {"user_name": "Nuevo", "timestamp": ahora.isoformat(), "delta": -20, "razon": "Evento PVP: NO ASISTIÓ"},
+                ]
+            )
+
+    asyncio.run(crear())
+    return motor
+
+
+def test_migra_base_original(base_original):
+    async def escenario():
+        await data_manager.init_db()
+        return {
+            "versiones": await consultar("SELECT version FROM schema_version ORDER BY version"),
+            "asistencia": await consultar(
+                "SELECT event_name, user_name, status, delta, justificacion_consumida FROM event_attendance ORDER BY user_name"
+            ),
+            "justificaciones": await consultar("SELECT user_name, event_name FROM user_justification ORDER BY event_name"),
+            "json_eventos": await consultar("SELECT linked_users, late_users, penalties FROM events"),
+            "json_usuarios": await consultar("SELECT justified_events FROM users"),
+            "discord_ids": await consultar("SELECT name, discord_id FROM users ORDER BY id"),
+            "revertidos": await consultar("SELECT name, revertido FROM events ORDER BY name"),
+            "historial": await consultar("SELECT user_name, delta, razon FROM score_history ORDER BY id"),
+            "cambios": await consultar("SELECT cambios FROM db_state"),
+            "aliases": await consultar("SELECT COUNT(*) FROM aliases"),
+            "corridas": await consultar(
+                "SELECT DISTINCT a.event_timestamp = e.timestamp FROM event_attendance a JOIN events e ON e.name = a.event_name"
+            ),
+        }
+
+    bd = asyncio.run(escenario())
+
+    assert bd["versiones"] == [(version,) for version, _, _ in sorted(migraciones.MIGRACIONES)]
+    assert bd["asistencia"] == [
+        ("PVP", "Martin", ASISTIO, 10, False),
+        ("PVP", "Nuevo", NO_ASISTIO, -20, False),
+        # Viejo llegó tarde: la llegada reemplaza a su penalización.
+        ("PVP", "Viejo", TARDE, 10, False),
+    ]
+    assert bd["justificaciones"] == [("Martin", "BOSS"), ("Martin", "PVP")]
+    assert bd["json_eventos"] == [(None, None, None)] * 2
+    assert bd["json_usuarios"] == [(None,)] * 4
+    # Ante un discord_id repetido se conserva el usuario creado último.
+    assert bd["discord_ids"] == [("Martin", 10), ("Viejo", None), ("Nuevo", 20), ("SinCuenta", None)]
+    assert bd["revertidos"] == [("BOSS", False), ("PVP", False)]
+    assert bd["historial"] == [("Martin", 10, "Evento PVP: ASISTIÓ"), ("Nuevo", -20, "Evento PVP: NO ASISTIÓ")]
+    assert bd["cambios"] == [(1,)]
+    assert bd["aliases"] == [(10,)]
+    # La asistencia migrada queda en la corrida que guardaba events.
+    assert bd["corridas"] == [(1,)]
+
+
+def test_esquema_migrado(base_original):
+    def inspeccionar(sync_conn):
+        inspector = inspect(sync_conn)
+        return (
+            {c["name"]: c["type"] for c in inspector.get_columns("score_history")}["razon"],
+            {i["name"]: i["unique"] for i in inspector.get_indexes("users")},
+            {i["name"] for i in inspector.get_indexes("score_history")},
+        )
+
+    async def escenario():
+        await data_manager.init_db()
+        async with base_original.connect() as conn:
+            esquema = await conn.run_sync(inspeccionar)
+        with pytest.raises(IntegrityError):
+            async with base_original.begin() as conn:
+                await conn.execute(text("INSERT INTO users (discord_id, name) VALUES (10, 'Duplicado')"))
+        return esquema
+
+    razon, indices_users, indices_historial = asyncio.run(escenario())
+
+    assert razon.compile(dialect=base_original.dialect) == "TEXT"
+    assert indices_users["ix_users_discord_id"]
+    assert {"ix_score_history_timestamp", "ix_score_history_user_name_timestamp"} <= indices_historial
+
+
+def test_base_migrada_se_carga(base_original):
+    asyncio.run(data_manager.init_db())
+    asyncio.run(data_manager.cargar_todos_los_datos())
+
+    martin = data_manager.user_data["Martin"]
+    assert (martin.score, martin.justified_events, martin.equipo) == (50, {"PVP", "BOSS"}, {"rol": "TANK"})
+    assert data_manager.user_data["Nuevo"].equipo == {}
+    assert data_manager.user_data.nombre_por_discord_id(20) == "Nuevo"
+    assert data_manager.user_data["SinCuenta"].absence_until is not None
+    # Solo el evento vigente se carga, con la asistencia que estaba en JSON.
+    assert set(data_manager.events_info) == {"PVP"}
+    assert data_manager.events_info["PVP"].asistencia == {
+        "Martin": (ASISTIO, 10), "Nuevo": (NO_ASISTIO, -20), "Viejo": (TARDE, 10)
+    }
+    assert data_manager.aliases["nebu"] == "xNebu"
+
+
+def test_migraciones_no_se_repiten(base_original):
+    async def escenario():
+        await data_manager.init_db()
+        antes = await consultar("SELECT * FROM event_attendance ORDER BY id"), await consultar("SELECT cambios FROM db_state")
+        reporte = await migraciones.aplicar_migraciones(base_original)
+        await data_manager.init_db()
+        despues = await consultar("SELECT * FROM event_attendance ORDER BY id"), await consultar("SELECT cambios FROM db_state")
+        return reporte, antes, despues
+
+    reporte, antes, despues = asyncio.run(escenario())
+
+    assert reporte == []
+    assert despues == antes
+
+
+def test_base_nueva_queda_en_la_ultima_version(motor):
+    async def escenario():
+        await data_manager.init_db()
+        return await consultar("SELECT version FROM schema_version ORDER BY version"), await consultar("SELECT cambios FROM db_state")
+
+    versiones, cambios = asyncio.run(escenario())
+
+    assert versiones == [(version,) for version, _, _ in sorted(migraciones.MIGRACIONES)]
+    assert cambios == [(1,)]
+
+
+def test_asistencia_sin_corrida_pasa_a_clave_por_corrida(motor):
+    """Una base en la versión 7 tiene event_attendance única por (evento, usuario);
+    la migración 8 le agrega event_timestamp y cambia la restricción."""
+    ahora = datetime.utcnow()
+
+    async def escenario():
+        await data_manager.init_db()
+        async with motor.begin() as conn:
+            await conn.execute(text("DROP TABLE event_attendance"))
+            await conn.execute(text(
+                "CREATE TABLE event_attendance (id INTEGER NOT NULL, event_name VARCHAR(255), user_name VARCHAR(255), "
+                "status VARCHAR(50), delta INTEGER, justificacion_consumida BOOLEAN DEFAULT (0) NOT NULL, PRIMARY KEY (id), "
+                "CONSTRAINT uq_event_attendance_event_user UNIQUE (event_name, user_name))"
+            ))
+            await conn.execute(text("CREATE INDEX ix_event_attendance_user_status ON event_attendance (user_name, status)"))
+            await conn.execute(text("DELETE FROM schema_version WHERE version = 8"))
+            await conn.execute(
+                text("INSERT INTO events (name, timestamp, puntaje, revertido) VALUES ('PVP', :ts, 10, 0)"),
+                {"ts": ahora.isoformat()}
+            )
+            await conn.execute(text(
+                "INSERT INTO event_attendance (event_name, user_name, status, delta, justificacion_consumida) "
+                "VALUES ('PVP', 'Martin', 'ASISTIÓ', 10, 1)"
+            ))
+
+        reporte = await migraciones.aplicar_migraciones(motor)
+        filas = await consultar(
+            "SELECT event_name, event_timestamp, user_name, status, delta, justificacion_consumida FROM event_attendance"
+        )
+        async with motor.connect() as conn:
+            indices = await conn.run_sync(lambda sync_conn: {i["name"] for i in inspect(sync_conn).get_indexes("event_attendance")})
+        # Otra corrida del mismo evento entra; la misma corrida repetida no.
+        async with motor.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO event_attendance (event_name, event_timestamp, user_name, status, delta) "
+                "VALUES ('PVP', :ts, 'Martin', 'ASISTIÓ', 10)"
+            ), {"ts": (ahora + timedelta(days=1)).isoformat()})
+        with pytest.raises(IntegrityError):
+            async with motor.begin() as conn:
+                await conn.execute(text(
+                    "INSERT INTO event_attendance (event_name, event_timestamp, user_name, status, delta) "
+                    "VALUES ('PVP', :ts, 'Martin', 'TARDE', 10)"
+                ), {"ts": ahora.isoformat()})
+        return reporte, filas, indices
+
+    reporte, filas, indices = asyncio.run(escenario())
+
+    assert [version for version, _, _ in reporte] == [8]
+    assert filas == [("PVP", ahora.isoformat(), "Martin", ASISTIO, 10, 1)]
+    assert "ix_event_attendance_user_status" in indices
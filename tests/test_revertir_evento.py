@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+
+import data_manager
+from data_manager import aplicar_eventos, apply_delta, bloquear_usuarios, evento_persistido, revertir_evento
+from event_logic import calcular_evento
+from conftest import consultar, estado_base, estado_memoria
+
+
+async def cargar_pvp():
+    """PVP de 10 al que asiste jugador0, jugador1 llega tarde (!llegue), jugador2 falta
+    justificado, jugador3 falta con DKP sumado antes del evento y jugador4 está de vacaciones."""
+    data_manager.user_data["jugador2"].justified_events.add("PVP")
+    data_manager.user_data["jugador4"].status = "vacaciones"
+    await data_manager.guardar_datos()
+    await apply_delta("jugador3", 7, "Ajuste manual")
+
+    plan = calcular_evento("PVP", 10, False, {"jugador0"}, datetime.utcnow())
+    async with bloquear_usuarios(data_manager.user_data.keys()):
+        await aplicar_eventos([plan])
+    await apply_delta("jugador1", 20, "Llegué tarde (penalización devuelta) - PVP")
+
+
+def test_revertir_deshace_el_evento(base):
+    async def escenario():
+        await cargar_pvp()
+        scores_cargado = {nombre: record.score for nombre, record in data_manager.user_data.items()}
+        resultado = await revertir_evento("PVP")
+        return scores_cargado, resultado, await estado_base(), await evento_persistido("PVP")
+
+    scores_cargado, (inversos, restaurados), bd, persistido = asyncio.run(escenario())
+
+    assert scores_cargado == {"jugador0": 10, "jugador1": 0, "jugador2": -10, "jugador3": -13, "jugador4": 0}
+    # A jugador1 la llegada tarde ya le compensó la falta: no tiene nada que revertir.
+    assert inversos == {"jugador0": -10, "jugador2": 10, "jugador3": 20}
+    assert restaurados == ["jugador2"]
+
+    scores = {nombre: record.score for nombre, record in data_manager.user_data.items()}
+    assert scores == {"jugador0": 0, "jugador1": 0, "jugador2": 0, "jugador3": 7, "jugador4": 0}
+    assert bd["users"] == sorted(scores.items())
+    assert data_manager.user_data["jugador2"].justified_events == {"PVP"}
+    assert bd["user_justification"] == [("jugador2", "PVP")]
+    assert bd["event_attendance"] == []
+    assert persistido[1] is True
+    assert "PVP" not in data_manager.events_info
+
+    # El historial conserva los asientos del evento y suma los inversos.
+    reversiones = [fila for fila in bd["score_history"] if fila[3] == "Reversión del evento PVP"]
+    assert sorted((fila[0], fila[2]) for fila in reversiones) == sorted(inversos.items())
+    assert len(data_manager.score_history) == len(bd["score_history"])
+
+
+def test_revertir_dos_veces_no_cambia_nada(base):
+    async def escenario():
+        await cargar_pvp()
+        await revertir_evento("PVP")
+        antes = estado_memoria(), await estado_base()
+        segunda = await revertir_evento("PVP")
+        return antes, segunda, (estado_memoria(), await estado_base())
+
+    antes, segunda, despues = asyncio.run(escenario())
+
+    assert segunda is None
+    assert despues == antes
+    assert data_manager.user_data["jugador2"].justified_events == {"PVP"}
+
+
+def test_revertir_evento_inexistente(base):
+    async def escenario():
+        return await revertir_evento("NADA"), await estado_base()
+
+    antes = asyncio.run(estado_base())
+    resultado, despues = asyncio.run(escenario())
+
+    assert resultado is None
+    assert despues == antes
+
+
+def test_revertido_sobrevive_a_recargar_y_se_puede_volver_a_cargar(base):
+    async def escenario():
+        await cargar_pvp()
+        await revertir_evento("PVP")
+        memoria = {nombre: (record.score, sorted(record.justified_events)) for nombre, record in data_manager.user_data.items()}
+        await data_manager.cargar_todos_los_datos()
+        recargada = {nombre: (record.score, sorted(record.justified_events)) for nombre, record in data_manager.user_data.items()}
+        eventos_recargados = set(data_manager.events_info)
+
+        plan = calcular_evento("PVP", 5, False, {"jugador1"}, datetime.utcnow())
+        async with bloquear_usuarios(data_manager.user_data.keys()):
+            await aplicar_eventos([plan])
+        cargado = await evento_persistido("PVP")
+        segunda = await revertir_evento("PVP")
+        return memoria, recargada, eventos_recargados, cargado, segunda
+
+    memoria, recargada, eventos_recargados, cargado, segunda = asyncio.run(escenario())
+
+    assert recargada == memoria
+    assert "PVP" not in eventos_recargados
+    assert cargado[1] is False
+    assert segunda is not None
+    assert data_manager.user_data["jugador1"].score == 0
+    assert data_manager.user_data["jugador2"].justified_events == {"PVP"}
+    assert asyncio.run(consultar("SELECT COUNT(*) FROM event_attendance")) == [(0,)]